@@ -0,0 +1,93 @@
+"""
+Сравнение форматов хранения библиотеки: размер файла, время сохранения и загрузки.
+
+Запуск из корня репозитория:
+    python -m benchmarks.storage_benchmark --books 20000
+"""
+import os
+import time
+import uuid
+import logging
+import argparse
+import tempfile
+
+from library.library import Library
+
+
+FORMATS = ("library.json", "library.json.gz", "library.json.bz2", "library.json.xz")
+
+
+def generate_records(count: int) -> list:
+    """
+    Генерирует записи книг для замера.
+    """
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Книга номер {number}",
+            "author": f"Автор {number % 1000}",
+            "year": 1800 + number % 225,
+            "status": "Выдана" if number % 3 == 0 else "В наличии",
+        }
+        for number in range(count)
+    ]
+
+
+def measure(directory: str, file_name: str, records: list, repeat: int) -> dict:
+    """
+    Сохраняет и загружает библиотеку repeat раз, возвращает лучшие времена и размер файла.
+    """
+    file_path = os.path.join(directory, file_name)
+
+    library = Library(file_path)
+    library.add_books(records)
+
+    save_times = []
+    load_times = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        library.write_data_to_json()
+        save_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        Library(file_path)
+        load_times.append(time.perf_counter() - start)
+
+    return {
+        "format": file_name,
+        "size": os.path.getsize(file_path),
+        "save": min(save_times),
+        "load": min(load_times),
+    }
+
+
+def main():
+    # Каждая созданная книга пишет INFO в logs/console.log; при замере это только шум
+    logging.getLogger("library").setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="Замер форматов хранения библиотеки.")
+    parser.add_argument("--books", type=int, default=20000, help="число книг")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов (берется лучший результат)")
+    args = parser.parse_args()
+
+    records = generate_records(args.books)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [measure(directory, file_name, records, args.repeat) for file_name in FORMATS]
+
+    base = results[0]
+
+    print(f"Книг: {args.books}\n")
+    print(f"{'Формат':<18} | {'Размер, КБ':>11} | {'Сжатие':>7} | {'Сохранение, с':>13} | {'Загрузка, с':>11}")
+    print("-" * 73)
+
+    for result in results:
+        print(
+            f"{result['format']:<18} | {result['size'] / 1024:>11.1f} | {base['size'] / result['size']:>6.1f}x | "
+            f"{result['save']:>13.3f} | {result['load']:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -18,8 +18,9 @@ class Book:
 
     Класс используется для создания объектов книг с уникальным id, статусом,
     а также заданными названием, автором и годом издания
-    Реализует методы для представления объекта в виде строки __repr__ и сравнения книг
-    по __eq__
+    Реализует методы для представления объекта в виде строки __repr__, сравнения книг
+    по __eq__ и хэширования по __hash__, поэтому книги можно хранить в множествах и
+    использовать как ключи словарей
 
     Атрибуты:
         id (str): Уникальный идентификатор книги, генерируется автоматически
@@ -31,6 +32,8 @@ class Book:
     Методы:
         __repr__: Возвращает строковое представление объекта
         __eq__: Сравнивает книги по уникальному идентификатору
+        __hash__: Хэширует книгу по уникальному идентификатору
+        from_dict: Восстанавливает книгу из словаря без проверок и записи в лог
     """
 
     def __init__(self, title: str, author: str, year: int):
@@ -78,6 +81,30 @@ class Book:
 
         return False
 
+    def __hash__(self) -> int:
+        """
+        Хэш книги по id, согласованный с __eq__
+
+        id не следует менять, пока книга находится в множестве или используется как ключ словаря
+        """
+        return hash(self.id)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Book":
+        """
+        Восстанавливает книгу из словаря to_dict без проверок и записи в лог
+
+        Предназначен для уже сохраненных данных, например при чтении из разделяемой памяти
+        """
+        book = cls.__new__(cls)
+        book.id = data["id"]
+        book.title = data["title"]
+        book.author = data["author"]
+        book.year = data["year"]
+        book.status = data["status"]
+
+        return book
+
     def to_dict(self) -> dict:
         """
         Преобразует объект книги в словарь
@@ -0,0 +1,426 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from operator import itemgetter
+from typing import Iterator, Optional
+
+from library.book import Book
+
+
+def normalize(value):
+    """
+    Нормализует строку для сравнения: схлопывает пробелы и приводит к единому регистру.
+    """
+    if isinstance(value, str):
+        result = " ".join(value.split()).casefold()
+        # Уже нормализованная строка не копируется
+        return value if result == value else result
+
+    return value
+
+
+def identity_key(title, author, year) -> tuple:
+    """
+    Ключ, по которому книги считаются дубликатами: (нормализованное название, автор, год).
+    """
+    return normalize(title), normalize(author), year
+
+
+# Поля книги, значения которых каталог запоминает для обновления индексов и счетчиков
+BOOK_FIELDS = ("title", "author", "year", "status")
+# Поля с индексом значение -> id. У статуса всего пара значений: индекс по нему
+# не сужает кандидатов, поэтому условие на статус проверяется фильтром
+INDEXED_FIELDS = ("title", "author", "year")
+# Поля, для которых поддерживается RankedCounter: для них нужен быстрый top;
+# количество по остальным полям берется из индексов
+RANKED_FIELDS = ("author", "decade")
+
+
+def index_value(field: str, value):
+    """
+    Значение, под которым книга хранится в индексе поля. Статус сравнивается без учета регистра.
+    """
+    if field == "status" and isinstance(value, str):
+        return value.casefold()
+
+    return value
+
+
+def add_id(index: dict, key, book_id: str) -> bool:
+    """
+    Добавляет id в индекс key -> id книг. Возвращает True, если ключ новый.
+
+    Единственный id хранится как есть, множество создается только при втором id:
+    у большинства ключей одна книга, и множество на каждый ключ удвоило бы память индекса.
+    """
+    ids = index.get(key)
+
+    if ids is None:
+        index[key] = book_id
+        return True
+
+    if isinstance(ids, set):
+        ids.add(book_id)
+    elif ids != book_id:
+        index[key] = {ids, book_id}
+
+    return False
+
+
+def discard_id(index: dict, key, book_id: str) -> bool:
+    """
+    Удаляет id из индекса, созданного add_id. Возвращает True, если ключ удален.
+    """
+    ids = index[key]
+
+    if not isinstance(ids, set):
+        del index[key]
+        return True
+
+    ids.discard(book_id)
+    if len(ids) == 1:
+        index[key] = next(iter(ids))
+
+    return False
+
+
+def decade_of(year):
+    """
+    Десятилетие года (1949 -> 1940) или None для некорректного года.
+    """
+    return year // 10 * 10 if isinstance(year, int) else None
+
+
+class RankedCounter:
+    """
+    Счетчик значений, упорядоченный по частоте.
+
+    Помимо значение -> количество хранит группы значений с одинаковым количеством
+    и отсортированный список различных количеств. Изменение счетчика стоит O(1)
+    (плюс вставка в короткий список различных количеств), а most_common(n)
+    берет не более n значений из групп с наибольшими количествами, поэтому его
+    время пропорционально n, а не размеру групп.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._buckets = {}
+        self._ranks = []
+
+    def add(self, value) -> None:
+        count = self._counts.get(value, 0)
+        self._move(value, count, count + 1)
+
+    def remove(self, value) -> None:
+        count = self._counts[value]
+        self._move(value, count, count - 1)
+
+    def _move(self, value, old: int, new: int) -> None:
+        if old:
+            bucket = self._buckets[old]
+            del bucket[value]
+            if not bucket:
+                del self._buckets[old]
+                del self._ranks[bisect_left(self._ranks, old)]
+
+        if not new:
+            del self._counts[value]
+            return
+
+        self._counts[value] = new
+        if new not in self._buckets:
+            # Словарь вместо множества: значения группы упорядочены по времени попадания в нее
+            self._buckets[new] = {}
+            insort(self._ranks, new)
+        self._buckets[new][value] = None
+
+    def __getitem__(self, value) -> int:
+        return self._counts.get(value, 0)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def items(self):
+        return self._counts.items()
+
+    def most_common(self, n: int) -> list:
+        """
+        n самых частых значений в виде пар (значение, количество).
+
+        При равном количестве значения идут в порядке, в котором они достигли этого количества.
+        """
+        result = []
+
+        for count in reversed(self._ranks):
+            if len(result) >= n:
+                break
+
+            result.extend((value, count) for value in islice(self._buckets[count], n - len(result)))
+
+        return result
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._buckets.clear()
+        self._ranks.clear()
+
+
+class Catalog(dict):
+    """
+    Словарь книг id -> Book, поддерживающий вторичные индексы.
+
+    Индексы обновляются при любом изменении словаря (присваивание, удаление,
+    update, pop, clear), поэтому остаются согласованными и при работе
+    с Library.books как с обычным словарем. Для каждой книги запоминаются
+    значения, по которым она проиндексирована, поэтому после изменения
+    атрибутов книги на месте достаточно присвоить ее заново: catalog[book.id] = book.
+
+    Индексы:
+        identity: хэш (нормализованного названия, автора, года) -> id книги или множество id,
+        если книг с этим хэшем несколько (см. add_id); по нему дубликаты находятся за O(1).
+        Хранится хэш, а не сам ключ, чтобы не держать нормализованные копии строк;
+        совпадение ключей проверяется по значениям книг из _keys.
+        title, author, year: значение поля -> id книги или множество id;
+        для года дополнительно хранится отсортированный список значений
+        для поиска по диапазону. Статус не индексируется.
+
+    Агрегаты:
+        количество книг по title, author и year берется из индексов, по статусу
+        хранится отдельный счетчик, а для author и decade поддерживается RankedCounter
+        для быстрого most_common.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+        self._keys = {}
+        self._identity = {}
+        self._duplicates = set()
+        self._fields = {field: {} for field in INDEXED_FIELDS}
+        self._years = []
+        self._status_counts = {}
+        self._counters = {field: RankedCounter() for field in RANKED_FIELDS}
+        # Порядковый номер добавления книги, чтобы выдавать результаты в порядке каталога
+        self._positions = {}
+        self._next_position = 0
+
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, book_id: str, book: Book) -> None:
+        # Значения книги читаются до изменения словаря: для значения, не являющегося книгой,
+        # исключение не оставит в каталоге непроиндексированную запись
+        entry = self._entry(book)
+
+        if book_id in self:
+            self._unindex(book_id)
+        else:
+            self._positions[book_id] = self._next_position
+            self._next_position += 1
+
+        super().__setitem__(book_id, book)
+        self._index(book_id, entry)
+
+    def __delitem__(self, book_id: str) -> None:
+        super().__delitem__(book_id)
+        self._unindex(book_id)
+        del self._positions[book_id]
+
+    def pop(self, book_id: str, *default):
+        if book_id in self:
+            book = super().pop(book_id)
+            self._unindex(book_id)
+            del self._positions[book_id]
+            return book
+
+        if default:
+            return default[0]
+
+        raise KeyError(book_id)
+
+    def popitem(self) -> tuple:
+        book_id, book = super().popitem()
+        self._unindex(book_id)
+        del self._positions[book_id]
+        return book_id, book
+
+    def clear(self) -> None:
+        super().clear()
+
+        self._keys.clear()
+        self._identity.clear()
+        self._duplicates.clear()
+        self._years.clear()
+        self._positions.clear()
+
+        for index in self._fields.values():
+            index.clear()
+
+        self._status_counts.clear()
+
+        for counter in self._counters.values():
+            counter.clear()
+
+    def update(self, *args, **kwargs) -> None:
+        for book_id, book in dict(*args, **kwargs).items():
+            self[book_id] = book
+
+    def setdefault(self, book_id: str, book: Book) -> Book:
+        if book_id not in self:
+            self[book_id] = book
+
+        return self[book_id]
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        # Индексы не сериализуются: при распаковке каталог строится заново из книг
+        return Catalog, (dict(self),)
+
+    @staticmethod
+    def _entry(book: Book) -> tuple:
+        """
+        Значения полей книги, по которым она индексируется.
+
+        Хранятся сами значения книги, без копий: ключи индексов вычисляются из них.
+        """
+        return tuple(getattr(book, field) for field in BOOK_FIELDS)
+
+    def _index(self, book_id: str, values: tuple) -> None:
+        self._keys[book_id] = values
+        key = hash(identity_key(*values[:3]))
+
+        if not add_id(self._identity, key, book_id) and isinstance(self._identity[key], set):
+            self._duplicates.add(key)
+
+        for field, value in zip(INDEXED_FIELDS, values):
+            if add_id(self._fields[field], value, book_id) and field == "year" and isinstance(value, int):
+                insort(self._years, value)
+
+        status = index_value("status", values[3])
+        self._status_counts[status] = self._status_counts.get(status, 0) + 1
+
+        self._counters["author"].add(values[1])
+        self._counters["decade"].add(decade_of(values[2]))
+
+    def _unindex(self, book_id: str) -> None:
+        values = self._keys.pop(book_id)
+        key = hash(identity_key(*values[:3]))
+
+        if discard_id(self._identity, key, book_id) or not isinstance(self._identity[key], set):
+            self._duplicates.discard(key)
+
+        for field, value in zip(INDEXED_FIELDS, values):
+            if discard_id(self._fields[field], value, book_id) and field == "year" and isinstance(value, int):
+                del self._years[bisect_left(self._years, value)]
+
+        status = index_value("status", values[3])
+        self._status_counts[status] -= 1
+        if not self._status_counts[status]:
+            del self._status_counts[status]
+
+        self._counters["author"].remove(values[1])
+        self._counters["decade"].remove(decade_of(values[2]))
+
+    def lookup(self, field: str, value) -> set:
+        """
+        Множество id книг с заданным значением индексируемого поля. Возвращаемое множество нельзя изменять.
+        """
+        ids = self._fields[field].get(value)
+
+        if ids is None:
+            return frozenset()
+
+        return ids if isinstance(ids, set) else frozenset((ids,))
+
+    def years_between(self, low: Optional[int] = None, high: Optional[int] = None,
+                      include_low: bool = True, include_high: bool = True) -> list:
+        """
+        Отсортированный список годов каталога в диапазоне; None означает отсутствие границы.
+        """
+        start = 0
+        end = len(self._years)
+
+        if low is not None:
+            start = (bisect_left if include_low else bisect_right)(self._years, low)
+        if high is not None:
+            end = (bisect_right if include_high else bisect_left)(self._years, high)
+
+        return self._years[start:end]
+
+    def counts(self, field: str) -> dict:
+        """
+        Количество книг по значениям поля (title, author, year, status) или по decade.
+
+        Время пропорционально числу различных значений, а не числу книг.
+        """
+        if field in INDEXED_FIELDS:
+            return {value: len(ids) if isinstance(ids, set) else 1 for value, ids in self._fields[field].items()}
+
+        if field == "status":
+            return dict(self._status_counts)
+
+        return dict(self._counters[field].items())
+
+    def most_common(self, field: str, n: int) -> list:
+        """
+        n самых частых значений поля в виде пар (значение, количество).
+
+        Для author и decade ответ берется из RankedCounter за время, пропорциональное n,
+        для остальных полей - частичной сортировкой counts(field).
+        """
+        if field in self._counters:
+            return self._counters[field].most_common(n)
+
+        return heapq.nlargest(n, self.counts(field).items(), key=itemgetter(1))
+
+    def in_order(self, ids, limit: Optional[int] = None) -> list:
+        """
+        Упорядочивает id в порядке добавления книг в каталог; limit - сколько первых id вернуть.
+
+        Небольшое множество сортируется по порядковым номерам, большое - отбирается
+        одним проходом по каталогу.
+        """
+        if not isinstance(ids, (set, frozenset)):
+            ids = set(ids)
+
+        if limit is not None and limit < len(ids):
+            return heapq.nsmallest(limit, ids, key=self._positions.__getitem__)
+
+        if len(ids) * 8 < len(self):
+            return sorted(ids, key=self._positions.__getitem__)
+
+        return [book_id for book_id in self if book_id in ids]
+
+    def duplicates_of(self, title: str, author: str, year: int, book_id: Optional[str] = None) -> set:
+        """
+        Возвращает id книг с тем же названием, автором и годом (кроме book_id).
+        """
+        key = identity_key(title, author, year)
+        ids = self._identity.get(hash(key), ())
+        if not isinstance(ids, set):
+            ids = (ids,) if ids else ()
+
+        return {other_id for other_id in ids if other_id != book_id and self._identity_of(other_id) == key}
+
+    def duplicate_groups(self) -> Iterator[list]:
+        """
+        Генератор групп id книг-дубликатов.
+
+        Перебираются только ключи, у которых больше одной книги, поэтому время
+        пропорционально числу дубликатов, а не размеру каталога.
+        """
+        for key in self._duplicates:
+            groups = {}
+
+            # Книги с одинаковым хэшем группируются по самому ключу на случай коллизии
+            for book_id in self._identity[key]:
+                groups.setdefault(self._identity_of(book_id), []).append(book_id)
+
+            for group in groups.values():
+                if len(group) > 1:
+                    yield sorted(group)
+
+    def _identity_of(self, book_id: str) -> tuple:
+        return identity_key(*self._keys[book_id][:3])
@@ -1,9 +1,18 @@
 import os
+import csv
 import json
+import heapq
 import logging
-from typing import Union
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Iterator, Optional, Union
 
 from library.book import Book
+from library.catalog import INDEXED_FIELDS, Catalog, identity_key, index_value
+from library.streaming import (
+    HashingReader, HashingWriter, chunk_report, is_compressed, iter_csv_records, iter_json_array,
+    open_storage, rate, timed_chunks, write_records
+)
 
 
 if not os.path.exists("logs"):
@@ -16,6 +25,464 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Поля, по которым можно искать, и их типы
+QUERY_FIELDS = {"title": str, "author": str, "year": int, "status": str}
+RANGE_LOOKUPS = {"lt", "lte", "gt", "gte", "between"}
+LOOKUPS = {"eq", "in", "contains"} | RANGE_LOOKUPS
+LOOKUP_SYMBOLS = {"eq": "=", "lt": "<", "lte": "<=", "gt": ">", "gte": ">=", "in": "IN",
+                  "between": "BETWEEN", "contains": "CONTAINS"}
+
+
+def _check_type(field: str, value) -> None:
+    """
+    Проверяет тип значения условия для поля.
+    """
+    if QUERY_FIELDS[field] is int and (not isinstance(value, int) or isinstance(value, bool)):
+        logger.error("Некорректный тип значения для %s: %s", field, value)
+        raise TypeError("Year должен быть целым числом")
+
+    if QUERY_FIELDS[field] is str and not isinstance(value, str):
+        logger.error("Некорректный тип значения для %s: %s", field, value)
+        raise TypeError(f"{field} должен быть строкой")
+
+
+class Query(ABC):
+    """
+    Базовый класс условий поиска.
+
+    Условия комбинируются операторами & (И), | (ИЛИ) и ~ (НЕ):
+        Q(author="Джордж Оруэлл") | Q(year__between=(1920, 1930)) & ~Q(status="выдана")
+    """
+
+    def __and__(self, other: "Query") -> "Query":
+        return And(self, other)
+
+    def __or__(self, other: "Query") -> "Query":
+        return Or(self, other)
+
+    def __invert__(self) -> "Query":
+        return Not(self)
+
+    @abstractmethod
+    def matches(self, book: Book) -> bool:
+        """
+        Проверяет, удовлетворяет ли книга условию.
+        """
+
+
+class Condition(Query):
+    """
+    Условие на одно поле книги: field lookup value.
+
+    Поддерживаемые операции: eq, in, contains (для строк), lt, lte, gt, gte, between (для года).
+    """
+
+    def __init__(self, field: str, lookup: str, value):
+
+        if field not in QUERY_FIELDS:
+            logger.error("Некорректный параметр поиска: %s", field)
+            raise ValueError(f"Допустимые параметры поиска: {', '.join(QUERY_FIELDS)}")
+
+        if lookup not in LOOKUPS:
+            logger.error("Некорректная операция поиска: %s", lookup)
+            raise ValueError(f"Допустимые операции поиска: {', '.join(sorted(LOOKUPS))}")
+
+        if lookup in RANGE_LOOKUPS and QUERY_FIELDS[field] is not int:
+            raise ValueError(f"Операция {lookup} поддерживается только для year")
+
+        if lookup == "contains" and QUERY_FIELDS[field] is not str:
+            raise ValueError(f"Операция contains не поддерживается для {field}")
+
+        if lookup == "in":
+            if isinstance(value, (str, bytes)) or not hasattr(value, "__iter__"):
+                raise TypeError("Значение для in должно быть списком")
+            value = tuple(value)
+            for item in value:
+                _check_type(field, item)
+            key = frozenset(index_value(field, item) for item in value)
+
+        elif lookup == "between":
+            if not isinstance(value, (tuple, list)) or len(value) != 2:
+                raise TypeError("Значение для between должно быть парой (от, до)")
+            for item in value:
+                _check_type(field, item)
+            value = key = tuple(value)
+
+        else:
+            _check_type(field, value)
+            key = index_value(field, value)
+
+        self.field = field
+        self.lookup = lookup
+        self.value = value
+        self.key = key
+
+    def year_bounds(self) -> tuple:
+        """
+        Границы диапазона для индекса года: (от, до, включая от, включая до).
+        """
+        if self.lookup == "between":
+            return self.key[0], self.key[1], True, True
+
+        return {
+            "lt": (None, self.key, True, False),
+            "lte": (None, self.key, True, True),
+            "gt": (self.key, None, False, True),
+            "gte": (self.key, None, True, True),
+        }[self.lookup]
+
+    def matches(self, book: Book) -> bool:
+        value = index_value(self.field, getattr(book, self.field))
+
+        if self.lookup == "eq":
+            return value == self.key
+        if self.lookup == "in":
+            return value in self.key
+        if self.lookup == "contains":
+            return isinstance(value, str) and self.key in value
+        if not isinstance(value, int):
+            return False
+
+        low, high, include_low, include_high = self.year_bounds()
+
+        return ((low is None or value > low or include_low and value == low)
+                and (high is None or value < high or include_high and value == high))
+
+    def __repr__(self) -> str:
+        return f"{self.field} {LOOKUP_SYMBOLS[self.lookup]} {self.value!r}"
+
+
+class And(Query):
+    """
+    Все условия выполняются.
+    """
+
+    def __init__(self, *children: Query):
+        # Вложенные And разворачиваются, чтобы планировщик видел все условия сразу
+        self.children = tuple(
+            grandchild for child in children
+            for grandchild in (child.children if isinstance(child, And) else (child,))
+        )
+
+    def matches(self, book: Book) -> bool:
+        return all(child.matches(book) for child in self.children)
+
+    def __repr__(self) -> str:
+        return "(" + " AND ".join(map(repr, self.children)) + ")"
+
+
+class Or(Query):
+    """
+    Выполняется хотя бы одно условие.
+    """
+
+    def __init__(self, *children: Query):
+        # Как и в And, вложенные Or разворачиваются
+        self.children = tuple(
+            grandchild for child in children
+            for grandchild in (child.children if isinstance(child, Or) else (child,))
+        )
+
+    def matches(self, book: Book) -> bool:
+        return any(child.matches(book) for child in self.children)
+
+    def __repr__(self) -> str:
+        return "(" + " OR ".join(map(repr, self.children)) + ")"
+
+
+class Not(Query):
+    """
+    Условие не выполняется.
+    """
+
+    def __init__(self, child: Query):
+        self.child = child
+
+    def matches(self, book: Book) -> bool:
+        return not self.child.matches(book)
+
+    def __repr__(self) -> str:
+        return f"NOT {self.child!r}"
+
+
+def Q(**kwargs) -> Query:
+    """
+    Создает условие из именованных параметров вида field или field__lookup.
+
+    Несколько параметров объединяются через И:
+        Q(author="Джордж Оруэлл", year__gte=1945)
+    """
+    if not kwargs:
+        raise ValueError("Параметры поиска не указаны")
+
+    conditions = []
+
+    for key, value in kwargs.items():
+        field, _, lookup = key.partition("__")
+        conditions.append(Condition(field, lookup or "eq", value))
+
+    return conditions[0] if len(conditions) == 1 else And(*conditions)
+
+
+def check_order(sort_by: Optional[str], limit: Optional[int]) -> None:
+    """
+    Проверяет параметры сортировки и ограничения числа результатов.
+    """
+    if sort_by is not None and (not isinstance(sort_by, str) or sort_by.lstrip("-") not in QUERY_FIELDS):
+        raise ValueError(f"Сортировка возможна по полям: {', '.join(QUERY_FIELDS)}")
+
+    if limit is not None and (not isinstance(limit, int) or limit < 0):
+        raise ValueError("limit должен быть неотрицательным целым числом")
+
+
+def order_books(books: list, sort_by: Optional[str], limit: Optional[int]) -> list:
+    """
+    Сортирует и ограничивает результаты; для небольшого limit используется частичная сортировка.
+
+    Сортировка устойчивая: книги с равным значением поля сохраняют исходный порядок.
+    """
+    if not sort_by:
+        return books if limit is None else books[:limit]
+
+    field = sort_by.lstrip("-")
+    reverse = sort_by.startswith("-")
+
+    def key(book):
+        value = getattr(book, field)
+        return value is not None, value if value is not None else 0
+
+    if limit is not None and limit < len(books):
+        return (heapq.nlargest if reverse else heapq.nsmallest)(limit, books, key=key)
+
+    return sorted(books, key=key, reverse=reverse)
+
+
+class Plan(ABC):
+    """
+    Узел плана выполнения запроса.
+
+    rows - оценка числа найденных книг, cost - оценка стоимости в числе
+    просмотренных id или книг. execute возвращает множество id, refine сужает
+    уже найденных кандидатов (по умолчанию - пересечением с execute).
+    """
+
+    def __init__(self, description: str, rows: int, cost: int, children: tuple = ()):
+        self.description = description
+        self.rows = rows
+        self.cost = cost
+        self.children = children
+
+    @property
+    def indexed(self) -> bool:
+        return True
+
+    @abstractmethod
+    def execute(self, books: Catalog) -> set:
+        """
+        Возвращает множество id книг, найденных этим узлом плана.
+        """
+
+    def refine(self, books: Catalog, candidates: set) -> set:
+        return candidates & self.execute(books)
+
+    def explain(self, depth: int = 0) -> list:
+        lines = ["  " * depth + f"{self.description} (rows≈{self.rows}, cost≈{self.cost})"]
+
+        for child in self.children:
+            lines.extend(child.explain(depth + 1))
+
+        return lines
+
+
+class IndexPlan(Plan):
+    """
+    Выборка id из индекса поля по условию eq, in или диапазону года.
+    """
+
+    def __init__(self, condition: Condition, books: Catalog):
+        self.condition = condition
+
+        if condition.lookup == "eq":
+            self.keys = (condition.key,)
+            cost = 1
+        elif condition.lookup == "in":
+            self.keys = tuple(condition.key)
+            cost = len(self.keys)
+        else:
+            self.keys = tuple(books.years_between(*condition.year_bounds()))
+            cost = len(self.keys) + 1
+
+        rows = sum(len(books.lookup(condition.field, key)) for key in self.keys)
+        # Для нескольких значений множества объединяются, это стоит rows
+        super().__init__(f"IndexLookup {condition!r}", rows, cost if len(self.keys) < 2 else cost + rows)
+
+    def execute(self, books: Catalog) -> set:
+        if len(self.keys) == 1:
+            return books.lookup(self.condition.field, self.keys[0])
+
+        return set().union(*(books.lookup(self.condition.field, key) for key in self.keys))
+
+
+class ScanPlan(Plan):
+    """
+    Полный просмотр каталога с проверкой условия для каждой книги.
+    """
+
+    def __init__(self, query: Query, books: Catalog):
+        self.query = query
+        super().__init__(f"FullScan {query!r}", len(books), len(books))
+
+    @property
+    def indexed(self) -> bool:
+        return False
+
+    def execute(self, books: Catalog) -> set:
+        return {book_id for book_id, book in books.items() if self.query.matches(book)}
+
+
+class UnionPlan(Plan):
+    """
+    Объединение множеств id, найденных по индексам (ИЛИ).
+    """
+
+    def __init__(self, children: list, books: Catalog):
+        rows = min(len(books), sum(child.rows for child in children))
+        super().__init__("Union", rows, sum(child.cost + child.rows for child in children), tuple(children))
+
+    def execute(self, books: Catalog) -> set:
+        return set().union(*(child.execute(books) for child in self.children))
+
+
+class DifferencePlan(Plan):
+    """
+    Все книги, кроме найденных по индексу (НЕ).
+    """
+
+    def __init__(self, child: Plan, books: Catalog):
+        super().__init__("Difference", len(books) - child.rows, len(books) + child.cost, (child,))
+
+    def execute(self, books: Catalog) -> set:
+        return books.keys() - self.children[0].execute(books)
+
+
+class FilterPlan(Plan):
+    """
+    Проверка условия для каждого кандидата, найденного предыдущими шагами.
+    """
+
+    def __init__(self, query: Query, rows: int):
+        self.query = query
+        super().__init__(f"Filter {query!r}", rows, rows)
+
+    @property
+    def indexed(self) -> bool:
+        return False
+
+    def execute(self, books: Catalog) -> set:
+        return self.refine(books, books.keys())
+
+    def refine(self, books: Catalog, candidates: set) -> set:
+        return {book_id for book_id in candidates if self.query.matches(books[book_id])}
+
+
+class IntersectPlan(Plan):
+    """
+    Пересечение (И): начинает с самого селективного индекса, пересекает кандидатов
+    с другими индексами и проверяет остальные условия на оставшихся кандидатах.
+    """
+
+    def __init__(self, driver: Plan, steps: list):
+        rows = driver.rows
+        cost = driver.cost
+
+        for step in steps:
+            if isinstance(step, FilterPlan):
+                cost += step.cost
+            else:
+                cost += step.cost + min(rows, step.rows)
+                rows = min(rows, step.rows)
+
+        super().__init__("Intersect", rows, cost, (driver, *steps))
+
+    def execute(self, books: Catalog) -> set:
+        driver, *steps = self.children
+        candidates = driver.execute(books)
+
+        for step in steps:
+            if not candidates:
+                break
+
+            candidates = step.refine(books, candidates)
+
+        return candidates
+
+
+class QueryPlanner:
+    """
+    Стоимостной планировщик запросов по индексам каталога.
+
+    Для каждого условия оценивает число книг по индексу; для И выбирает самый
+    селективный индекс, затем пересекает кандидатов с индексами, которые не дороже
+    проверки кандидатов, а остальные условия (в том числе на неиндексируемый статус)
+    применяет как фильтр. Полный просмотр используется, только если подходящего индекса нет.
+    """
+
+    def __init__(self, books: Catalog):
+        self.books = books
+
+    def plan(self, query: Query) -> Plan:
+        if isinstance(query, Condition):
+            if query.lookup == "contains" or query.field not in INDEXED_FIELDS:
+                return ScanPlan(query, self.books)
+            return IndexPlan(query, self.books)
+
+        if isinstance(query, Not):
+            child = self.plan(query.child)
+            if not child.indexed:
+                return ScanPlan(query, self.books)
+            return DifferencePlan(child, self.books)
+
+        if isinstance(query, Or):
+            children = [self.plan(child) for child in query.children]
+            if not all(child.indexed for child in children):
+                return ScanPlan(query, self.books)
+            return UnionPlan(children, self.books)
+
+        if isinstance(query, And):
+            return self._plan_and(query)
+
+        raise TypeError(f"Неподдерживаемое условие: {query!r}")
+
+    def _plan_and(self, query: And) -> Plan:
+        planned = [(self.plan(child), child) for child in query.children]
+        # Отрицание дешевле проверить на кандидатах, чем строить дополнение
+        indexed = sorted(
+            ((plan, child) for plan, child in planned if plan.indexed and not isinstance(child, Not)),
+            key=lambda item: item[0].cost + item[0].rows,
+        )
+
+        if not indexed:
+            return ScanPlan(query, self.books)
+
+        driver = indexed[0][0]
+        rows = driver.rows
+        steps = []
+        filters = []
+
+        for plan, child in indexed[1:]:
+            # Пересечение выгоднее фильтра, если получить множество id не дороже проверки кандидатов
+            if plan.cost <= rows:
+                steps.append(plan)
+                rows = min(rows, plan.rows)
+            else:
+                filters.append(child)
+
+        filters.extend(child for plan, child in planned if not plan.indexed or isinstance(child, Not))
+        steps.extend(FilterPlan(child, rows) for child in filters)
+
+        return driver if not steps else IntersectPlan(driver, steps)
+
+
 class Library:
     """
     Класс Library представляет собой систему управления библиотекой.
@@ -29,17 +496,36 @@ class Library:
     write_data_to_json(file_path: str) -> None
         Записывает данные библиотеки в указанный JSON-файл.
 
-    read_data_from_json(file_path: str) -> None
-        Считывает данные библиотеки из указанного JSON-файла.
+    read_data_from_json(force: bool = False) -> None
+        Считывает данные библиотеки из указанного JSON-файла, пропуская неизмененный файл
+        и применяя только изменившиеся записи.
+
+    import_from_csv(file_path: str, chunk_size: int, report: Callable) -> dict
+        Потоково импортирует книги из CSV-файла блоками.
+
+    export_books(file_path: str, chunk_size: int, report: Callable) -> int
+        Потоково экспортирует книги в CSV или JSON Lines.
 
     add_book(title: str, author: str, year: int) -> None
         Добавляет новую книгу в библиотеку.
 
+    add_books(records: Iterable[dict]) -> int
+        Добавляет пачку книг из словарей, пропуская некорректные записи и дубликаты.
+
+    find_duplicates() -> list
+        Возвращает группы книг с одинаковыми названием, автором и годом.
+
     remove_book(book_id: str) -> None
         Удаляет книгу из библиотеки по указанному id.
 
     search_books(**kwargs) -> list
-        Ищет книги по заданным параметрам (title, author, year).
+        Ищет книги по заданным параметрам (title, author, year, status, диапазоны, списки).
+
+    query(query: Query, sort_by: str, limit: int) -> list
+        Выполняет составной запрос с И, ИЛИ, НЕ по индексам каталога.
+
+    explain(query: Query, **kwargs) -> str
+        Возвращает выбранный план запроса и его оценку стоимости.
 
     search_books_by_id(book_id: str) -> Union[Book, None]
         Ищет книгу в библиотеке по id.
@@ -47,46 +533,123 @@ class Library:
     all_books() -> None
         Отображает список всех книг в библиотеке в табличном формате.
 
+    count_by(field: str) -> dict
+        Количество книг по значениям поля (author, year, status, title) или по decade.
+
+    top(field: str, n: int) -> list
+        n самых частых значений поля, например самые представленные авторы.
+
+    decade_histogram() -> dict
+        Количество книг по десятилетиям в порядке возрастания.
+
     update_status(book_id: str, new_status: str) -> None
         Изменяет статус книги по id.
 
     """
     VALID_STATUSES = {"в наличии", "выдана"}
+    AGGREGATE_FIELDS = ("title", "author", "year", "status", "decade")
 
     def __init__(self, file_path: str = "library.json"):
         
         self.books = {}
         self.file_path = file_path
+
+        # Состояние последней синхронизации с файлом: (путь, mtime_ns, размер, sha256)
+        # и хэши содержимого записей по id для инкрементальной перезагрузки
+        self._file_state = None
+        self._record_hashes = {}
+
         self.read_data_from_json()
 
+    @property
+    def books(self) -> Catalog:
+        """
+        Книги библиотеки по id. Присвоенный словарь оборачивается в Catalog.
+        """
+        return self._books
+
+    @books.setter
+    def books(self, books: dict) -> None:
+        self._books = books if isinstance(books, Catalog) else Catalog(books)
+
     def write_data_to_json(self):
         """
         Записывает данные библиотеки в файл JSON
+
+        Если у файла расширение .gz, .bz2, .xz или .lzma, данные потоково сжимаются
+        соответствующим алгоритмом из стандартной библиотеки.
+
+        После записи запоминает состояние файла и хэши записей, чтобы следующая
+        перезагрузка из того же файла была пропущена.
         """
         try:
-            with open(self.file_path, "w", encoding="utf-8") as file:
-                json.dump([book.to_dict() for book in self.books.values()], file, indent=4, ensure_ascii=False)
+            records = [book.to_dict() for book in self.books.values()]
+
+            # Сжатые снимки пишутся компактно, обычный JSON - с отступами, как раньше
+            if is_compressed(self.file_path):
+                options = {"separators": (",", ":")}
+            else:
+                options = {"indent": 4}
+
+            with open_storage(self.file_path, "w") as file:
+                writer = HashingWriter(file)
+                json.dump(records, writer, ensure_ascii=False, **options)
+
+            self._remember_file_state(os.stat(self.file_path), writer.hexdigest())
+            self._record_hashes = {record["id"]: self._record_hash(record) for record in records}
+
             logger.info("Данные успешно записаны в файл %s", self.file_path)
         except Exception as e:
             logger.error("Ошибка при записи данных в файл: %s", e)
             raise ValueError(f"Ошибка при записи данных в файл: {e}") from e
 
 
-    def read_data_from_json(self):
+    def read_data_from_json(self, force: bool = False):
         """
         Читает данные из файла JSON
+
+        Файл разбирается потоково, по одной записи; сжатые файлы (.gz, .bz2, .xz, .lzma)
+        при этом потоково распаковываются, а хэш содержимого считается в том же проходе.
+
+        Перезагрузка инкрементальная: если mtime и размер файла не изменились с последнего
+        чтения или записи, файл не читается; если не изменился хэш содержимого, прочитанные
+        записи не применяются. Иначе записи сравниваются по id и хэшу содержимого,
+        и применяются только добавления, удаления и изменения. Записи без id пропускаются.
+        force=True отключает проверку состояния файла.
         """
         try:
             if os.path.exists(self.file_path) and os.path.getsize(self.file_path) > 0:
 
-                with open(self.file_path, "r", encoding="utf-8") as file:
-                    books_data = json.load(file)
+                # Состояние берется до чтения: если файл заменят во время разбора,
+                # следующая перезагрузка увидит новые mtime и размер
+                stat = os.stat(self.file_path)
+                state = self._file_state
+                same_file = state is not None and state[0] == self.file_path
+                old_hashes = self._record_hashes if same_file else {}
+
+                if not force and same_file and state[1:3] == (stat.st_mtime_ns, stat.st_size):
+                    logger.info("Файл %s не изменился, перезагрузка пропущена", self.file_path)
+                    return
+
+                with open_storage(self.file_path, "rb") as file:
+                    reader = HashingReader(file)
+                    books_data = iter_json_array(reader)
 
-                    for book_data in books_data:
-                        book = Book(book_data["title"], book_data["author"], book_data["year"])
-                        book.id = book_data["id"]
-                        book.status = book_data["status"]
-                        self.books[book.id] = book
+                    if books_data is None:
+                        logger.warning("Файл %s пуст", self.file_path)
+                        return
+
+                    pending, new_hashes = self._stage_records(books_data, old_hashes, force)
+
+                digest = reader.hexdigest()
+
+                if not force and same_file and state[3] == digest:
+                    self._remember_file_state(stat, digest)
+                    logger.info("Содержимое файла %s не изменилось, перезагрузка пропущена", self.file_path)
+                    return
+
+                self._apply_records(pending, new_hashes, old_hashes)
+                self._remember_file_state(stat, digest)
 
                 logger.info("Данные успешно загружены из файла %s", self.file_path)
             else:
@@ -96,16 +659,157 @@ class Library:
             logger.error("Неизвестная ошибка при чтении данных из файла: %s", e)
             raise ValueError(f"Ошибка при чтении данных из файла: {e}") from e
 
+    def _stage_records(self, books_data: Iterable[dict], old_hashes: dict, force: bool = False) -> tuple:
+        """
+        Сравнивает прочитанные записи с предыдущим состоянием файла (old_hashes - хэши
+        записей по id) и возвращает пару (новые и измененные книги, хэши всех записей).
+
+        Записи могут поступать потоком: в памяти копятся только новые и измененные книги.
+        Записи без id пропускаются: иначе книга получала бы новый id при каждой перезагрузке.
+        При force=True все записи из файла считаются измененными.
+        """
+        new_hashes = {}
+        pending = []
+
+        for book_data in books_data:
+            book_id = book_data.get("id")
+
+            if not book_id:
+                logger.error("Запись без id пропущена: %s", book_data)
+                continue
+
+            record_hash = self._record_hash(book_data)
+            new_hashes[book_id] = record_hash
+
+            if not force and old_hashes.get(book_id) == record_hash and book_id in self.books:
+                continue
+
+            # Сохраненная книга восстанавливается без новой проверки, генерации id и записи в лог
+            pending.append(Book.from_dict({**book_data, "status": book_data.get("status") or "В наличии"}))
+
+        return pending, new_hashes
+
+    def _apply_records(self, pending: list, new_hashes: dict, old_hashes: dict) -> None:
+        """
+        Применяет к библиотеке разницу, найденную _stage_records.
+
+        Новые книги добавляются, измененные обновляются на месте, а записи,
+        исчезнувшие из файла, удаляются. Книги, добавленные в память и еще
+        не сохраненные, не затрагиваются.
+        """
+        added = changed = 0
+
+        for book in pending:
+            current = self.books.get(book.id)
+
+            if current is None:
+                added += 1
+            else:
+                current.title, current.author, current.year, current.status = (
+                    book.title, book.author, book.year, book.status
+                )
+                book = current
+                changed += 1
+
+            self.books[book.id] = book
+
+        removed = 0
+        for book_id in old_hashes.keys() - new_hashes.keys():
+            if self.books.pop(book_id, None) is not None:
+                removed += 1
+
+        self._record_hashes = new_hashes
+        logger.info("Перезагрузка: добавлено %d, изменено %d, удалено %d", added, changed, removed)
+
+    def _remember_file_state(self, stat: os.stat_result, digest: str) -> None:
+        """
+        Запоминает путь, mtime, размер (из stat) и хэш содержимого файла библиотеки.
+        """
+        self._file_state = (self.file_path, stat.st_mtime_ns, stat.st_size, digest)
+
+    @staticmethod
+    def _record_hash(record: dict) -> int:
+        """
+        Хэш содержимого записи книги (без id).
+        """
+        return hash((record.get("title"), record.get("author"), record.get("year"), record.get("status")))
+
+    def import_from_csv(self, file_path: str, chunk_size: int = 10000,
+                        report: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Потоково импортирует книги из CSV-файла.
+
+        Файл читается построчно и обрабатывается блоками по chunk_size записей,
+        каждый блок добавляется через add_books. Статистика по каждому блоку пишется
+        в лог и передается в report. Возвращает итоговую статистику импорта.
+        """
+        added = 0
+        rejected = 0
+        start = time.perf_counter()
+
+        try:
+            for number, chunk, chunk_elapsed in timed_chunks(iter_csv_records(file_path), chunk_size):
+                chunk_added = self.add_books(chunk)
+
+                added += chunk_added
+                rejected += len(chunk) - chunk_added
+                chunk_report(number, chunk_added, len(chunk) - chunk_added, chunk_elapsed(), report)
+
+        except (OSError, ValueError, csv.Error) as e:
+            logger.error("Ошибка при импорте из CSV-файла %s: %s", file_path, e)
+            raise ValueError(f"Ошибка при импорте из CSV-файла: {e}") from e
+
+        elapsed = time.perf_counter() - start
+        logger.info("Импортировано книг из %s: %d, отклонено: %d", file_path, added, rejected)
+
+        return {
+            "added": added,
+            "rejected": rejected,
+            "elapsed": elapsed,
+            "rate": rate(added, elapsed),
+        }
+
+    def iter_records(self) -> Iterator[dict]:
+        """
+        Генератор словарей книг библиотеки (без копирования всего каталога).
+        """
+        for book in self.books.values():
+            yield book.to_dict()
+
+    def export_books(self, file_path: str, chunk_size: int = 10000,
+                     report: Optional[Callable[[dict], None]] = None) -> int:
+        """
+        Потоково экспортирует книги в CSV (.csv) или JSON Lines (.jsonl, .ndjson).
+
+        Для других расширений выбрасывается ValueError. Возвращает число записанных книг.
+        """
+        try:
+            total = write_records(file_path, self.iter_records(), chunk_size, report)
+        except (OSError, ValueError) as e:
+            logger.error("Ошибка при экспорте в файл %s: %s", file_path, e)
+            raise ValueError(f"Ошибка при экспорте в файл: {e}") from e
+
+        logger.info("Экспортировано книг в %s: %d", file_path, total)
+
+        return total
+
     def add_book(self, title: str, author: str, year: int) -> None:
         """
         Добавляет книгу в библиотеку.
 
         Создает новый объект книги с указанными атрибутами и добавляет его в список
         книг библиотеки. Если входные данные некорректны, будет выброшено исключение TypeError, которое будет
-        зафиксировано в логах
+        зафиксировано в логах. Если книга с тем же названием, автором и годом уже есть,
+        будет выброшено исключение ValueError
         """
         try:
             new_book = Book(title, author, year)
+
+            duplicates = self.books.duplicates_of(title, author, year)
+            if duplicates:
+                logger.error("Книга %s (%s, %d) уже есть в библиотеке: %s", title, author, year, duplicates)
+                raise ValueError(f"Книга уже есть в библиотеке (id {', '.join(sorted(duplicates))})")
+
             self.books[new_book.id] = new_book
             logger.info("Добавлена книга: %s (%s, %d)", new_book.title, new_book.author, new_book.year)
             logger.info("Всего книг в библиотеке: %d", len(self.books))
@@ -114,6 +818,75 @@ class Library:
             logger.error("Ошибка при добавлении книги: %s", e)
             raise
 
+    def add_books(self, records: Iterable[dict]) -> int:
+        """
+        Добавляет пачку книг из словарей с ключами title, author, year
+        и необязательными id, status.
+
+        Некорректные записи, записи с id, который уже есть в библиотеке, и дубликаты
+        (уже имеющиеся в библиотеке или повторяющиеся внутри пачки) пропускаются
+        и фиксируются в логах. Статус приводится к виду, который сохраняет update_status.
+        Книги попадают в библиотеку одним обновлением. Возвращает число добавленных книг.
+        """
+        new_books = {}
+        seen = {}
+
+        for record in records:
+            try:
+                status = record.get("status")
+                if status not in (None, "") and (not isinstance(status, str) or status.lower() not in self.VALID_STATUSES):
+                    raise ValueError(f"Недопустимый статус: {status}")
+
+                book = self._book_from_record(record)
+                if status:
+                    book.status = status.capitalize()
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error("Запись пропущена: %s (%s)", record, e)
+                continue
+
+            if book.id in self.books or book.id in new_books:
+                logger.error("Запись пропущена: книга с id %s уже есть в библиотеке", book.id)
+                continue
+
+            key = identity_key(book.title, book.author, book.year)
+            if seen.get(key, book.id) != book.id or self.books.duplicates_of(book.title, book.author, book.year, book.id):
+                logger.warning("Дубликат пропущен: %s", record)
+                continue
+
+            seen[key] = book.id
+            new_books[book.id] = book
+
+        self.books.update(new_books)
+        logger.info("Добавлено книг пачкой: %d, всего книг в библиотеке: %d", len(new_books), len(self.books))
+
+        return len(new_books)
+
+    def find_duplicates(self) -> list:
+        """
+        Отчет о дубликатах: группы книг с одинаковыми нормализованным названием, автором и годом.
+
+        Группы берутся из индекса каталога, поэтому весь каталог не перебирается.
+        """
+        groups = [[self.books[book_id] for book_id in ids] for ids in self.books.duplicate_groups()]
+
+        if groups:
+            logger.warning("Найдено групп дубликатов: %d", len(groups))
+
+        return groups
+
+    def _book_from_record(self, record: dict) -> Book:
+        """
+        Создает книгу из словаря. Если id или status не указаны, используются значения по умолчанию.
+        """
+        book = Book(record["title"], record["author"], record["year"])
+
+        if record.get("id"):
+            book.id = record["id"]
+
+        if record.get("status"):
+            book.status = record["status"]
+
+        return book
 
     def remove_book(self, book_id: str) -> None:
         """
@@ -133,49 +906,72 @@ class Library:
 
     def search_books(self, **kwargs) -> list:
         """
-        Ищет книги по title, author, year.
+        Ищет книги по title, author, year, status.
 
-        Можно указать один или несколько параметров для поиска.
+        Можно указать один или несколько параметров для поиска; все они должны выполняться.
+        Кроме точного совпадения поддерживаются операции в виде field__lookup:
+        year__gte=1900, year__between=(1900, 1950), author__in=[...], title__contains="...".
+        Параметры sort_by ("year" или "-year" для убывания) и limit задают порядок и
+        число результатов. Для OR и NOT используйте query() с объектами Q.
         """
         if not self.books:
             logger.warning("Библиотека пуста")
             return []
 
+        sort_by = kwargs.pop("sort_by", None)
+        limit = kwargs.pop("limit", None)
+
         if not kwargs:
             logger.warning("Параметры поиска не указаны")
             return []
 
-        sup_keys = {"title", "author", "year"}
-        search = {key: value for key, value in kwargs.items() if key in sup_keys}
-
-        for key, value in search.items():
-
-            if key == "year" and not isinstance(value, int):
-                logger.error("Некорректный тип значения для year: %s", value)
-                raise TypeError("Year должен быть целым числом")
+        return self.query(Q(**kwargs), sort_by=sort_by, limit=limit)
 
-            if key in {"title", "author"} and not isinstance(value, str):
-                logger.error("Некорректный тип значения для %s: %s", key, value)
-                raise TypeError(f"{key} должен быть строкой")
-
-        if not search:
-            logger.error("Некорректные параметры поиска: %s", kwargs)
-            raise ValueError(f"Допустимые параметры поиска: {', '.join(sup_keys)}")
+    def query(self, query: Query, sort_by: Optional[str] = None, limit: Optional[int] = None) -> list:
+        """
+        Выполняет составной запрос (объекты Q, объединенные &, |, ~).
 
+        Запрос выполняется по плану QueryPlanner: сначала самый селективный индекс,
+        затем пересечение с другими индексами и фильтрация кандидатов; полный
+        просмотр - только если подходящих индексов нет.
+        """
+        check_order(sort_by, limit)
 
-        result = [
-            book for book in self.books.values() if
-            all(getattr(book, key) == value for key, value in search.items())
-        ]
+        ids = QueryPlanner(self.books).plan(query).execute(self.books)
+        # Без сортировки результаты идут в порядке каталога, как при полном просмотре
+        ordered = self.books.in_order(ids, None if sort_by else limit)
+        result = order_books([self.books[book_id] for book_id in ordered], sort_by, limit)
 
         if result:
             logger.info("Найдены книги: %s", [book.to_dict() for book in result])
         else:
-            logger.warning("Книги по заданным критериям не найдены: %s", search)
-            return []
+            logger.warning("Книги по заданным критериям не найдены: %s", query)
 
         return result
 
+    def explain(self, query: Optional[Query] = None, sort_by: Optional[str] = None,
+                limit: Optional[int] = None, **kwargs) -> str:
+        """
+        Возвращает план выполнения запроса с оценками числа книг и стоимости.
+
+        Принимает объект Q или те же именованные параметры, что и search_books.
+        """
+        check_order(sort_by, limit)
+
+        if query is None:
+            query = Q(**kwargs)
+        elif kwargs:
+            query = query & Q(**kwargs)
+
+        lines = QueryPlanner(self.books).plan(query).explain()
+
+        if sort_by:
+            lines.insert(0, f"Sort {sort_by}" + (f", limit {limit}" if limit is not None else ""))
+        elif limit is not None:
+            lines.insert(0, f"Limit {limit}")
+
+        return "\n".join(lines)
+
 
     def search_books_by_id(self, book_id: str) -> Union[Book, None]:
         """
@@ -205,6 +1001,45 @@ class Library:
         logger.info("Отображено книг: %d", len(self.books))
 
 
+    def _check_aggregate_field(self, field: str) -> None:
+        """
+        Проверяет, что по полю поддерживается подсчет.
+        """
+        if field not in self.AGGREGATE_FIELDS:
+            logger.error("Некорректное поле для подсчета: %s", field)
+            raise ValueError(f"Допустимые поля для подсчета: {', '.join(self.AGGREGATE_FIELDS)}")
+
+    def count_by(self, field: str) -> dict:
+        """
+        Количество книг по значениям поля: author, year, status (в нижнем регистре), title или decade.
+
+        Количества берутся из индексов и счетчиков каталога, поэтому время ответа
+        пропорционально числу различных значений, а не числу книг.
+        """
+        self._check_aggregate_field(field)
+
+        return self.books.counts(field)
+
+    def top(self, field: str, n: int = 10) -> list:
+        """
+        n самых частых значений поля в виде пар (значение, количество), например top("author", 5).
+        """
+        if not isinstance(n, int) or n < 0:
+            raise ValueError("n должно быть неотрицательным целым числом")
+
+        self._check_aggregate_field(field)
+
+        return self.books.most_common(field, n)
+
+    def decade_histogram(self) -> dict:
+        """
+        Количество книг по десятилетиям (1940 -> число книг 1940-1949 годов) в порядке возрастания.
+        """
+        return dict(sorted(
+            (decade, count) for decade, count in self.count_by("decade").items() if decade is not None
+        ))
+
+
     def update_status(self, book_id: str, new_status: str) -> None:
         """
         Изменяет статус книги по id.
@@ -226,5 +1061,6 @@ class Library:
             raise ValueError(f"Книга с id {book_id} не найдена")
 
         book.status = new_status.capitalize()
+        self.books[book.id] = book
 
         logger.info("Статус книги с id %s изменён на '%s'", book_id, new_status)
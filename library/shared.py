@@ -0,0 +1,365 @@
+import sys
+import struct
+import logging
+from typing import Iterable, Union
+from multiprocessing import resource_tracker, shared_memory
+
+from library.book import Book
+from library.library import Q, check_order, order_books
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"LBSC"
+
+# Управляющий сегмент: номер текущего поколения данных
+CONTROL = struct.Struct("<Q")
+# Заголовок сегмента данных: сигнатура, число книг
+HEADER = struct.Struct("<4sI")
+# Элемент индекса: смещение записи; индекс отсортирован по id
+INDEX_ENTRY = struct.Struct("<Q")
+# Заголовок записи: год, длины id, названия, автора и статуса в байтах
+RECORD = struct.Struct("<qHIIH")
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Подключается к существующему сегменту, не регистрируя его в resource_tracker.
+
+    Иначе при завершении процесса-читателя сегмент, принадлежащий издателю, был бы удален.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+def _segment_name(name: str, generation: int) -> str:
+    return f"{name}_{generation}"
+
+
+def encode_books(books: Iterable[Book]) -> bytes:
+    """
+    Кодирует книги в компактный двоичный образ: заголовок, индекс по id и записи.
+
+    Записи идут в порядке каталога, а индекс со смещениями записей отсортирован по id.
+    """
+    records = []
+    offset = 0
+
+    for book in books:
+        fields = [str(value or "").encode("utf-8") for value in (book.id, book.title, book.author, book.status)]
+        record = RECORD.pack(book.year, *map(len, fields)) + b"".join(fields)
+        records.append((fields[0], offset, record))
+        offset += len(record)
+
+    start = HEADER.size + INDEX_ENTRY.size * len(records)
+    index = b"".join(INDEX_ENTRY.pack(start + offset) for _, offset, _ in sorted(records, key=lambda item: item[0]))
+
+    return b"".join([HEADER.pack(MAGIC, len(records)), index] + [record for _, _, record in records])
+
+
+class RecordView:
+    """
+    Закодированная запись книги, поля которой раскодируются по требованию.
+
+    Условия Q проверяются прямо на записи: год берется из заголовка, а строковое
+    поле раскодируется, только если условие к нему обращается.
+    """
+
+    __slots__ = ("_buf", "_starts", "_lengths", "year", "end")
+
+    def __init__(self, buf: memoryview, offset: int):
+        self.year, *self._lengths = RECORD.unpack_from(buf, offset)
+        self._buf = buf
+        self._starts = []
+
+        position = offset + RECORD.size
+        for length in self._lengths:
+            self._starts.append(position)
+            position += length
+
+        # Смещение следующей записи
+        self.end = position
+
+    def _field(self, number: int) -> str:
+        start = self._starts[number]
+        return bytes(self._buf[start:start + self._lengths[number]]).decode("utf-8")
+
+    @property
+    def id(self) -> str:
+        return self._field(0)
+
+    @property
+    def title(self) -> str:
+        return self._field(1)
+
+    @property
+    def author(self) -> str:
+        return self._field(2)
+
+    @property
+    def status(self) -> Union[str, None]:
+        return self._field(3) or None
+
+
+class SharedCatalogPublisher:
+    """
+    Публикует каталог книг в разделяемой памяти для процессов-читателей.
+
+    Каждая публикация создает новый сегмент данных (поколение) и затем переключает
+    на него управляющий сегмент name. Предыдущее поколение удаляется: читатели,
+    уже подключенные к нему, продолжают работать со своей копией отображения
+    и переходят на новое поколение при следующем запросе.
+
+    Пример:
+        publisher = SharedCatalogPublisher("library")
+        publisher.publish(library.books.values())
+        ...
+        library.add_book("Мы", "Евгений Замятин", 1920)
+        publisher.publish(library.books.values())
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.generation = 0
+        self._data = None
+
+        try:
+            self._control = shared_memory.SharedMemory(name, create=True, size=CONTROL.size)
+            CONTROL.pack_into(self._control.buf, 0, self.generation)
+        except FileExistsError:
+            self._recover()
+
+    def _recover(self) -> None:
+        """
+        Подхватывает сегменты, оставшиеся после аварийного завершения предыдущего издателя.
+
+        Управляющий сегмент используется повторно, поэтому уже подключенные читатели
+        увидят следующую публикацию; последнее опубликованное поколение удаляется
+        при следующей публикации. Одновременно работающих издателей с одним именем
+        быть не должно.
+        """
+        self._control = shared_memory.SharedMemory(self.name)
+        self.generation = CONTROL.unpack_from(self._control.buf, 0)[0]
+
+        if self.generation:
+            try:
+                self._data = shared_memory.SharedMemory(_segment_name(self.name, self.generation))
+            except FileNotFoundError:
+                self._data = None
+
+        logger.warning("Каталог %s подхвачен после предыдущего издателя, поколение %d", self.name, self.generation)
+
+    def _create_segment(self, name: str, size: int) -> shared_memory.SharedMemory:
+        """
+        Создает сегмент данных; неопубликованный остаток с тем же именем удаляется.
+        """
+        try:
+            return shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            logger.warning("Удален оставшийся сегмент %s", name)
+
+            return shared_memory.SharedMemory(name, create=True, size=size)
+
+    def publish(self, books: Iterable[Book]) -> int:
+        """
+        Публикует новое поколение каталога. Возвращает номер поколения.
+        """
+        payload = encode_books(books)
+        generation = self.generation + 1
+
+        data = self._create_segment(_segment_name(self.name, generation), len(payload))
+        data.buf[:len(payload)] = payload
+
+        CONTROL.pack_into(self._control.buf, 0, generation)
+
+        previous, self._data, self.generation = self._data, data, generation
+        if previous is not None:
+            previous.close()
+            previous.unlink()
+
+        logger.info("Опубликовано поколение %d каталога %s (%d байт)", generation, self.name, len(payload))
+
+        return generation
+
+    def close(self) -> None:
+        """
+        Удаляет сегменты каталога из разделяемой памяти.
+        """
+        for segment in (self._data, self._control):
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+
+        self._data = self._control = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SharedCatalog:
+    """
+    Каталог книг только для чтения поверх разделяемой памяти.
+
+    Подключается к каталогу, опубликованному SharedCatalogPublisher, без копирования
+    всех книг в процесс: search_books_by_id выполняет двоичный поиск по индексу,
+    search_books просматривает закодированные записи, и объекты Book создаются
+    только для найденных книг. Перед каждым запросом проверяется номер поколения,
+    и при публикации нового поколения читатель переключается на него.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.generation = None
+        self._control = _attach(name)
+        self._data = None
+        self._buf = None
+        self._count = 0
+
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """
+        Переключается на текущее поколение, если издатель опубликовал новое.
+        """
+        while True:
+            generation = CONTROL.unpack_from(self._control.buf, 0)[0]
+
+            if generation == self.generation:
+                return
+
+            if generation == 0:
+                raise ValueError(f"Каталог {self.name} еще не опубликован")
+
+            try:
+                data = _attach(_segment_name(self.name, generation))
+            except FileNotFoundError:
+                # Поколение успели заменить между чтением номера и подключением
+                continue
+
+            buf = data.buf.toreadonly()
+            magic, count = HEADER.unpack_from(buf, 0)
+
+            if magic != MAGIC:
+                buf.release()
+                data.close()
+                raise ValueError(f"Сегмент {data.name} не является каталогом книг")
+
+            self._release()
+            self._data, self._buf, self._count, self.generation = data, buf, count, generation
+            logger.info("Подключено поколение %d каталога %s", generation, self.name)
+
+    def _release(self) -> None:
+        if self._buf is not None:
+            self._buf.release()
+            self._data.close()
+
+        self._data = self._buf = None
+
+    def _record_id(self, offset: int) -> bytes:
+        id_len = RECORD.unpack_from(self._buf, offset)[1]
+        start = offset + RECORD.size
+
+        return bytes(self._buf[start:start + id_len])
+
+    @staticmethod
+    def _decode(record: RecordView) -> Book:
+        return Book.from_dict({
+            "id": record.id, "title": record.title, "author": record.author,
+            "year": record.year, "status": record.status,
+        })
+
+    def _offset(self, position: int) -> int:
+        return INDEX_ENTRY.unpack_from(self._buf, HEADER.size + position * INDEX_ENTRY.size)[0]
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._count
+
+    def search_books_by_id(self, book_id: str) -> Union[Book, None]:
+        """
+        Ищет книгу по id двоичным поиском по индексу.
+        """
+        self._refresh()
+
+        key = book_id.encode("utf-8")
+        low, high = 0, self._count
+
+        while low < high:
+            middle = (low + high) // 2
+            if self._record_id(self._offset(middle)) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self._count:
+            offset = self._offset(low)
+            if self._record_id(offset) == key:
+                return self._decode(RecordView(self._buf, offset))
+
+        return None
+
+    def search_books(self, **kwargs) -> list:
+        """
+        Ищет книги с теми же параметрами, что и Library.search_books: title, author, year,
+        status, операции field__lookup, sort_by и limit.
+
+        Условия проверяются на закодированных записях (RecordView), и объекты Book
+        создаются только для найденных книг. Как и в Library.search_books, без условий
+        возвращается пустой список, а без sort_by книги идут в порядке каталога.
+        """
+        sort_by = kwargs.pop("sort_by", None)
+        limit = kwargs.pop("limit", None)
+
+        check_order(sort_by, limit)
+
+        if not kwargs:
+            logger.warning("Параметры поиска не указаны")
+            return []
+
+        query = Q(**kwargs)
+
+        self._refresh()
+
+        offset = HEADER.size + INDEX_ENTRY.size * self._count
+        result = []
+
+        for _ in range(self._count):
+            if not sort_by and limit is not None and len(result) >= limit:
+                break
+
+            record = RecordView(self._buf, offset)
+            offset = record.end
+
+            if query.matches(record):
+                result.append(self._decode(record))
+
+        return order_books(result, sort_by, limit)
+
+    def close(self) -> None:
+        """
+        Отключается от разделяемой памяти (сегменты не удаляются).
+        """
+        self._release()
+
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,298 @@
+import os
+import bz2
+import csv
+import codecs
+import gzip
+import json
+import lzma
+import time
+import hashlib
+import logging
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("id", "title", "author", "year", "status")
+
+# Расширения файлов, в которые возможен экспорт записей
+EXPORT_FORMATS = (".csv", ".jsonl", ".ndjson")
+
+# Расширение файла -> функция открытия потока со сжатием
+COMPRESSORS = {
+    ".gz": lambda path, mode, **kwargs: gzip.open(path, mode, compresslevel=6, **kwargs),
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lambda path, mode, **kwargs: lzma.open(path, mode, format=lzma.FORMAT_ALONE, **kwargs),
+}
+
+
+def is_compressed(file_path: str) -> bool:
+    """
+    Проверяет, выбирается ли для файла сжатие по его расширению.
+    """
+    return os.path.splitext(file_path)[1].lower() in COMPRESSORS
+
+
+def open_storage(file_path: str, mode: str = "rb"):
+    """
+    Открывает файл библиотеки, выбирая сжатие по расширению (.gz, .bz2, .xz, .lzma).
+
+    Файлы с другими расширениями открываются без сжатия. Текстовые режимы
+    открываются в кодировке UTF-8. Сжатие и распаковка выполняются потоково.
+    """
+    opener = COMPRESSORS.get(os.path.splitext(file_path)[1].lower())
+    kwargs = {} if "b" in mode else {"encoding": "utf-8"}
+
+    if opener is None:
+        return open(file_path, mode, **kwargs)
+
+    if "b" not in mode and "t" not in mode:
+        mode += "t"
+
+    return opener(file_path, mode, **kwargs)
+
+
+class HashingWriter:
+    """
+    Обертка над текстовым файлом, считающая sha256 от записанного текста (UTF-8).
+
+    Позволяет получить хэш содержимого при потоковой записи без повторного чтения файла.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.digest = hashlib.sha256()
+
+    def write(self, text: str) -> int:
+        self.digest.update(text.encode("utf-8"))
+        return self.file.write(text)
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+class HashingReader:
+    """
+    Обертка над двоичным потоком, считающая sha256 от прочитанных байтов.
+
+    Позволяет получить хэш содержимого при потоковом чтении без отдельного прохода по файлу.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        self.digest.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+def iter_json_array(file, block_size: int = 1 << 16) -> Optional[Iterator]:
+    """
+    Потоково разбирает JSON-массив из двоичного потока UTF-8.
+
+    Начало массива читается сразу: для пустого потока возвращается None, для данных,
+    не являющихся массивом, выбрасывается ValueError. Иначе возвращается генератор
+    элементов массива; в памяти держится только текущий блок и разбираемый элемент.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    state = {"buffer": "", "pos": 0, "eof": False}
+
+    def fill() -> None:
+        block = file.read(block_size)
+        state["eof"] = not block
+        state["buffer"] = state["buffer"][state["pos"]:] + text_decoder.decode(block, final=not block)
+        state["pos"] = 0
+
+    def next_char() -> str:
+        """
+        Пропускает пробельные символы и возвращает следующий символ ('' в конце потока).
+        """
+        while True:
+            buffer, pos = state["buffer"], state["pos"]
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            state["pos"] = pos
+
+            if pos < len(buffer):
+                return buffer[pos]
+            if state["eof"]:
+                return ""
+            fill()
+
+    first = next_char()
+    if not first:
+        return None
+    if first != "[":
+        raise ValueError("Ожидался JSON-массив")
+    state["pos"] += 1
+
+    def elements() -> Iterator:
+        if next_char() == "]":
+            state["pos"] += 1
+        else:
+            while True:
+                next_char()
+                try:
+                    value, end = decoder.raw_decode(state["buffer"], state["pos"])
+                except json.JSONDecodeError:
+                    if state["eof"]:
+                        raise
+                    fill()
+                    continue
+
+                # Значение у самого конца блока может быть обрезано - дочитываем и разбираем заново
+                if end == len(state["buffer"]) and not state["eof"]:
+                    fill()
+                    continue
+
+                yield value
+                state["pos"] = end
+
+                separator = next_char()
+                state["pos"] += 1
+                if separator == "]":
+                    break
+                if separator != ",":
+                    raise ValueError("Некорректный JSON-массив: ожидалась ',' или ']'")
+
+        if next_char():
+            raise ValueError("Лишние данные после JSON-массива")
+
+    return elements()
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    Разбивает итерируемый объект на списки длиной не более size.
+    """
+    if size < 1:
+        raise ValueError("Размер блока должен быть положительным")
+
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def timed_chunks(iterable: Iterable, size: int) -> Iterator[tuple]:
+    """
+    Разбивает итерируемый объект на блоки, как chunked, и засекает время каждого блока.
+
+    Возвращает тройки (номер блока с 1, блок, elapsed); elapsed() - секунды с начала
+    получения блока, поэтому время включает и чтение записей из источника,
+    и их обработку до вызова elapsed().
+    """
+    chunks = chunked(iterable, size)
+    number = 0
+
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+
+        number += 1
+        yield number, chunk, lambda: time.perf_counter() - start
+
+
+def rate(count: int, elapsed: float) -> float:
+    """
+    Скорость обработки: число записей или операций в секунду (0, если время не измерено).
+    """
+    return count / elapsed if elapsed > 0 else 0.0
+
+
+def iter_csv_records(file_path: str) -> Iterator[dict]:
+    """
+    Построчно читает CSV-файл и возвращает записи книг.
+
+    Обязательные колонки: title, author, year. Колонки id и status необязательны.
+    Год преобразуется в int; если это невозможно, он передается дальше как есть
+    и запись будет отклонена при проверке.
+    """
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as file:
+        reader = csv.DictReader(file)
+
+        missing = {"title", "author", "year"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"В CSV-файле отсутствуют колонки: {', '.join(sorted(missing))}")
+
+        for row in reader:
+            record = {key: row.get(key) or None for key in FIELDS}
+
+            try:
+                record["year"] = int(record["year"])
+            except (TypeError, ValueError):
+                pass
+
+            yield record
+
+
+def write_records(file_path: str, records: Iterable[dict], chunk_size: int = 10000,
+                  report: Optional[Callable[[dict], None]] = None) -> int:
+    """
+    Потоково записывает записи книг в CSV (.csv) или JSON Lines (.jsonl, .ndjson).
+
+    Для других расширений выбрасывается ValueError: например, .json читается
+    как JSON-массив и не должен содержать JSON Lines. Записи обрабатываются
+    блоками по chunk_size, после каждого блока скорость передается в report
+    и в лог. Возвращает число записанных записей.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Допустимые расширения файла экспорта: {', '.join(EXPORT_FORMATS)}")
+
+    as_csv = extension == ".csv"
+    total = 0
+
+    with open(file_path, "w", encoding="utf-8", newline="") as file:
+
+        if as_csv:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+
+        for number, chunk, elapsed in timed_chunks(records, chunk_size):
+
+            if as_csv:
+                writer.writerows(chunk)
+            else:
+                file.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in chunk)
+
+            total += len(chunk)
+            chunk_report(number, len(chunk), 0, elapsed(), report)
+
+    return total
+
+
+def chunk_report(number: int, processed: int, rejected: int, elapsed: float,
+                 report: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Формирует статистику по блоку, пишет ее в лог и передает в report.
+    """
+    stats = {
+        "chunk": number,
+        "processed": processed,
+        "rejected": rejected,
+        "elapsed": elapsed,
+        "rate": rate(processed, elapsed),
+    }
+
+    logger.info("Блок %d: %d записей (отклонено %d) за %.3f с, %.1f записей/с",
+                number, processed, rejected, elapsed, stats["rate"])
+
+    if report:
+        report(stats)
+
+    return stats
@@ -1,6 +1,377 @@
+import sys
+import json
 import time
+import shlex
+import argparse
+
+from library.library import LOOKUPS, QUERY_FIELDS, Library
+from library.streaming import rate
+
+
+def op_add(library: Library, params: dict) -> bool:
+    """
+    Добавляет книгу: title, author, year.
+    """
+    library.add_book(params["title"], params["author"], int(params["year"]))
+    return True
+
+
+def op_remove(library: Library, params: dict) -> bool:
+    """
+    Удаляет книгу по book_id.
+    """
+    library.remove_book(params["book_id"])
+    return True
+
+
+def op_status(library: Library, params: dict) -> bool:
+    """
+    Изменяет статус книги: book_id, new_status.
+    """
+    library.update_status(params["book_id"], params["new_status"])
+    return True
+
+
+def coerce_search_params(params: dict) -> dict:
+    """
+    Приводит строковые параметры поиска из текстового сценария к нужным типам.
+
+    year и limit - к int, значения __in и __between задаются через запятую.
+    """
+    result = {}
+
+    for key, value in params.items():
+        field, _, lookup = key.partition("__")
+
+        if isinstance(value, str):
+            if lookup in {"in", "between"}:
+                value = [item.strip() for item in value.split(",")]
+                if field == "year":
+                    value = [int(item) for item in value]
+            elif field in {"year", "limit"}:
+                value = int(value)
+
+        result[key] = value
+
+    return result
+
+
+def op_search(library: Library, params: dict) -> bool:
+    """
+    Ищет книги по title, author, year, status (поддерживаются field__lookup, sort_by, limit)
+    и печатает результат.
+    """
+    results = library.search_books(**coerce_search_params(params))
+
+    if results:
+        for book in results:
+            print(book)
+    else:
+        print("Книги не найдены.")
+
+    return False
+
+
+def op_explain(library: Library, params: dict) -> bool:
+    """
+    Печатает план выполнения поиска с теми же параметрами, что и search.
+    """
+    print(library.explain(**coerce_search_params(params)))
+    return False
+
+
+def op_count(library: Library, params: dict) -> bool:
+    """
+    Печатает количество книг по значениям поля: field, top (необязательно, по умолчанию 10).
+    """
+    field = params.get("field", "author")
+
+    if field == "decade":
+        rows = library.decade_histogram().items()
+    else:
+        rows = library.top(field, int(params.get("top", 10)))
+
+    for value, count in rows:
+        print(f"{value}: {count}")
+
+    return False
+
+
+def op_list(library: Library, params: dict) -> bool:
+    """
+    Печатает все книги библиотеки.
+    """
+    library.all_books()
+    return False
+
+
+def print_chunk(stats: dict) -> None:
+    """
+    Печатает статистику по обработанному блоку записей.
+    """
+    print(
+        f"Блок {stats['chunk']}: {stats['processed']} записей, отклонено {stats['rejected']}, "
+        f"{stats['elapsed']:.3f} с, {stats['rate']:.1f} записей/с"
+    )
+
+
+def op_import(library: Library, params: dict) -> bool:
+    """
+    Импортирует книги из CSV-файла: file_path, chunk_size (необязательно).
+    """
+    summary = library.import_from_csv(params["file_path"], int(params.get("chunk_size", 10000)), print_chunk)
+    print(f"Импортировано книг: {summary['added']}, отклонено: {summary['rejected']}")
+    return summary["added"] > 0
+
+
+def op_export(library: Library, params: dict) -> bool:
+    """
+    Экспортирует книги в CSV или JSON Lines (.csv, .jsonl, .ndjson): file_path, chunk_size (необязательно).
+    """
+    total = library.export_books(params["file_path"], int(params.get("chunk_size", 10000)), print_chunk)
+    print(f"Экспортировано книг: {total}")
+    return False
+
+
+# Операция -> (функция, позиционные параметры в текстовом формате)
+OPERATIONS = {
+    "add": (op_add, ("title", "author", "year")),
+    "remove": (op_remove, ("book_id",)),
+    "status": (op_status, ("book_id", "new_status")),
+    "search": (op_search, ()),
+    "explain": (op_explain, ()),
+    "list": (op_list, ()),
+    "count": (op_count, ("field", "top")),
+    "import": (op_import, ("file_path", "chunk_size")),
+    "export": (op_export, ("file_path", "chunk_size")),
+}
+
+
+def accepts_keyword(op: str, key: str) -> bool:
+    """
+    Проверяет, принимает ли операция параметр key в виде key=value.
+
+    Для search и explain это поля поиска, field__lookup, sort_by и limit,
+    для остальных операций - имена их позиционных параметров.
+    """
+    if key in OPERATIONS[op][1]:
+        return True
+
+    if op not in {"search", "explain"}:
+        return False
+
+    if key in {"sort_by", "limit"}:
+        return True
+
+    field, sep, lookup = key.partition("__")
+
+    return field in QUERY_FIELDS and (not sep or lookup in LOOKUPS)
+
+
+def parse_line(line: str) -> tuple:
+    """
+    Разбирает строку сценария в пару (операция, параметры).
+
+    Поддерживаются два формата:
+        JSON Lines: {"op": "add", "title": "1984", "author": "Джордж Оруэлл", "year": 1949}
+        Текстовый: add "1984" "Джордж Оруэлл" 1949 или search author="Джордж Оруэлл"
+
+    Аргумент вида key=value считается именованным, только если операция принимает
+    параметр key; иначе это позиционное значение, например название "E=mc2".
+    """
+    if line.startswith("{"):
+        params = json.loads(line)
+        if not isinstance(params, dict) or "op" not in params:
+            raise ValueError("JSON-операция должна быть объектом с ключом 'op'")
+        return params.pop("op"), params
+
+    tokens = shlex.split(line)
+    op, args = tokens[0], tokens[1:]
+
+    if op not in OPERATIONS:
+        raise ValueError(f"Неизвестная операция: {op}")
+
+    positional = OPERATIONS[op][1]
+    params = {}
+    index = 0
+
+    for token in args:
+        key, sep, value = token.partition("=")
+        if sep and accepts_keyword(op, key):
+            params[key] = value
+        elif index < len(positional):
+            params[positional[index]] = token
+            index += 1
+        else:
+            raise ValueError(f"Лишний аргумент для операции {op}: {token}")
+
+    return op, params
+
+
+def execute(library: Library, op: str, params: dict) -> bool:
+    """
+    Выполняет одну операцию над библиотекой.
+
+    Возвращает True, если операция изменила библиотеку.
+    """
+    if op not in OPERATIONS:
+        raise ValueError(f"Неизвестная операция: {op}")
+
+    func, _ = OPERATIONS[op]
+
+    try:
+        return func(library, params)
+    except KeyError as e:
+        raise ValueError(f"Не указан параметр {e} для операции {op}") from e
+
+
+def run_batch(library: Library, operations, stop_on_error: bool = False) -> dict:
+    """
+    Выполняет операции подряд над одной загруженной библиотекой.
+
+    operations - итерируемый объект пар (операция, параметры) или строк сценария.
+    Библиотека сохраняется один раз в конце, если хотя бы одна операция её изменила;
+    ошибка сохранения учитывается в сводке как ошибка.
+    Возвращает сводку: число операций, ошибок, затраченное время и скорость.
+    """
+    done = 0
+    errors = 0
+    changed = False
+    start = time.perf_counter()
+
+    for number, item in enumerate(operations, start=1):
+
+        try:
+            if isinstance(item, str):
+                line = item.strip()
+                if not line or line.startswith("#"):
+                    continue
+                op, params = parse_line(line)
+            else:
+                op, params = item
+
+            changed = execute(library, op, params) or changed
+            done += 1
+
+        except Exception as e:
+            errors += 1
+            print(f"Ошибка в операции {number}: {e}", file=sys.stderr)
+            if stop_on_error:
+                break
+
+    saved = False
+
+    if changed:
+        try:
+            library.write_data_to_json()
+            saved = True
+        except Exception as e:
+            errors += 1
+            print(f"Ошибка при сохранении библиотеки: {e}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+
+    return {
+        "done": done,
+        "errors": errors,
+        "saved": saved,
+        "elapsed": elapsed,
+        "rate": rate(done, elapsed),
+    }
+
+
+def print_summary(summary: dict) -> None:
+    """
+    Печатает сводку пакетного выполнения.
+    """
+    print(
+        f"Выполнено операций: {summary['done']}, ошибок: {summary['errors']}, "
+        f"время: {summary['elapsed']:.3f} с, скорость: {summary['rate']:.1f} оп/с"
+        + (", библиотека сохранена" if summary["saved"] else "")
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Создает парсер аргументов неинтерактивного режима.
+    """
+    parser = argparse.ArgumentParser(description="Управление библиотекой без интерактивных запросов.")
+    parser.add_argument("-f", "--file", default="library.json", help="путь к файлу библиотеки (.json или сжатый .json.gz, .json.bz2, .json.xz)")
+    parser.add_argument("--stop-on-error", action="store_true", help="остановиться на первой ошибке")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="добавить книгу")
+    add.add_argument("title")
+    add.add_argument("author")
+    add.add_argument("year", type=int)
+
+    remove = commands.add_parser("remove", help="удалить книгу")
+    remove.add_argument("book_id")
+
+    status = commands.add_parser("status", help="обновить статус книги")
+    status.add_argument("book_id")
+    status.add_argument("new_status")
+
+    for command, help_text in (("search", "искать книги"), ("explain", "показать план поиска")):
+        search = commands.add_parser(command, help=help_text)
+        search.add_argument("--title")
+        search.add_argument("--author")
+        search.add_argument("--year", type=int)
+        search.add_argument("--status")
+        search.add_argument("--sort-by")
+        search.add_argument("--limit", type=int)
+        search.add_argument("conditions", nargs="*", metavar="field__lookup=value",
+                            help="дополнительные условия, например year__gte=1900 author__in=А,Б")
+
+    commands.add_parser("list", help="показать все книги")
+
+    count = commands.add_parser("count", help="количество книг по автору, году, статусу или десятилетию")
+    count.add_argument("field", choices=Library.AGGREGATE_FIELDS)
+    count.add_argument("--top", type=int, default=10)
+
+    import_csv = commands.add_parser("import", help="потоково импортировать книги из CSV")
+    import_csv.add_argument("file_path")
+    import_csv.add_argument("--chunk-size", type=int, default=10000)
+
+    export = commands.add_parser("export", help="потоково экспортировать книги в CSV или JSON Lines")
+    export.add_argument("file_path")
+    export.add_argument("--chunk-size", type=int, default=10000)
+
+    script = commands.add_parser("run", help="выполнить сценарий: по одной операции в строке или JSON Lines")
+    script.add_argument("script", nargs="?", default="-", help="файл сценария ('-' - стандартный ввод)")
+
+    return parser
+
+
+def run_cli(argv: list) -> int:
+    """
+    Неинтерактивный режим: одна команда из аргументов или сценарий из файла/stdin.
+    """
+    args = build_parser().parse_args(argv)
+    library = Library(args.file)
+
+    if args.command == "run":
+        if args.script == "-":
+            summary = run_batch(library, sys.stdin, args.stop_on_error)
+        else:
+            with open(args.script, "r", encoding="utf-8") as script:
+                summary = run_batch(library, script, args.stop_on_error)
+
+    else:
+        params = {
+            key: value for key, value in vars(args).items()
+            if key not in {"file", "stop_on_error", "command", "script", "conditions"} and value is not None
+        }
+        for condition in getattr(args, "conditions", ()):
+            key, _, value = condition.partition("=")
+            params[key] = value
+        summary = run_batch(library, [(args.command, params)], args.stop_on_error)
+
+    print_summary(summary)
+
+    return 1 if summary["errors"] else 0
 
-from library.library import Library
 
 def main():
     """
@@ -109,12 +480,13 @@ def main():
 
         else:
             print("Некорректная команда.")
-        
+
         time.sleep(5)
 
 
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     main()
-            
\ No newline at end of file
@@ -36,6 +36,15 @@ class TestBook(unittest.TestCase):
         book5 = book1
         self.assertTrue(book1 == book5)
 
+    def test_hash(self):
+
+        book1 = self.book
+        book2 = Book("Великий Гэтсби", "Ф. Скотт Фицджеральд", 1925)
+
+        self.assertEqual(hash(book1), hash(book1.id))
+        self.assertEqual(len({book1, book2, book1}), 2)
+        self.assertEqual({book1: "первая"}[book1], "первая")
+
     def test_to_dict(self):
 
         tested_dict = {
@@ -1,12 +1,17 @@
 import os
 import sys
+import gzip
 import json
+import pickle
 import uuid
 import unittest
 from io import StringIO
+from unittest import mock
 
-from library.library import Library
+from library.library import FilterPlan, Library, Plan, Q, Query
+from library.streaming import open_storage
 from library.book import Book
+from library.catalog import Catalog
 
 
 class TestReadJson(unittest.TestCase):
@@ -72,6 +77,137 @@ class TestReadJson(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.library.read_data_from_json()
 
+class TestIncrementalReload(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library("test_library.json")
+
+        self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        self.library.add_book("Мы", "Евгений Замятин", 1920)
+        self.library.write_data_to_json()
+
+    def tearDown(self):
+
+        if os.path.exists(self.library.file_path):
+            os.remove(self.library.file_path)
+
+    def write_records(self, records):
+
+        with open(self.library.file_path, "w", encoding="utf-8") as file:
+            json.dump(records, file, ensure_ascii=False, indent=4)
+
+    def test_skip_unchanged(self):
+
+        book = next(iter(self.library.books.values()))
+        book.title = "Изменено в памяти"
+
+        self.library.read_data_from_json()
+
+        self.assertEqual(book.title, "Изменено в памяти")
+
+    def test_skip_same_content(self):
+
+        book = next(iter(self.library.books.values()))
+        book.title = "Изменено в памяти"
+
+        os.utime(self.library.file_path, ns=(0, 0))
+        self.library.read_data_from_json()
+
+        self.assertEqual(book.title, "Изменено в памяти")
+
+    def test_apply_diff(self):
+
+        records = [book.to_dict() for book in self.library.books.values()]
+        kept, removed = records
+
+        kept["status"] = "Выдана"
+        added = {"id": str(uuid.uuid4()), "title": "Мастер и Маргарита",
+                 "author": "Михаил Булгаков", "year": 1967, "status": "В наличии"}
+
+        kept_book = self.library.books[kept["id"]]
+        self.library.add_book("Несохраненная", "Автор", 2000)
+
+        self.write_records([kept, added])
+        self.library.read_data_from_json()
+
+        self.assertIs(self.library.books[kept["id"]], kept_book)
+        self.assertEqual(kept_book.status, "Выдана")
+        self.assertIn(added["id"], self.library.books)
+        self.assertNotIn(removed["id"], self.library.books)
+        self.assertEqual(len(self.library.books), 3)
+
+    def test_corrupt_file_keeps_books(self):
+
+        before = {book_id: book.to_dict() for book_id, book in self.library.books.items()}
+        records = [book.to_dict() for book in self.library.books.values()]
+        records.append({"id": str(uuid.uuid4()), "title": "Мы", "author": "Евгений Замятин", "year": 1920})
+
+        with open(self.library.file_path, "w", encoding="utf-8") as file:
+            file.write(json.dumps(records, ensure_ascii=False)[:-10])
+
+        with self.assertRaises(ValueError):
+            self.library.read_data_from_json()
+
+        self.assertEqual({book_id: book.to_dict() for book_id, book in self.library.books.items()}, before)
+
+    def test_file_replaced_during_reload(self):
+
+        records = [book.to_dict() for book in self.library.books.values()]
+        added = {"id": str(uuid.uuid4()), "title": "Мастер и Маргарита",
+                 "author": "Михаил Булгаков", "year": 1967, "status": "В наличии"}
+
+        self.write_records(records[:1])
+        os.utime(self.library.file_path, ns=(1, 1))
+
+        replacement = self.library.file_path + ".new"
+        with open(replacement, "w", encoding="utf-8") as file:
+            json.dump(records[:1] + [added], file, ensure_ascii=False)
+        os.utime(replacement, ns=(2, 2))
+
+        real_open = open_storage
+
+        def open_and_replace(path, mode="rb"):
+            # Другой процесс заменяет файл, пока идет разбор старого содержимого
+            file = real_open(path, mode)
+            os.replace(replacement, path)
+            return file
+
+        with mock.patch("library.library.open_storage", open_and_replace):
+            self.library.read_data_from_json()
+
+        self.assertEqual(len(self.library.books), 1)
+
+        self.library.read_data_from_json()
+
+        self.assertEqual(len(self.library.books), 2)
+        self.assertIn(added["id"], self.library.books)
+
+    def test_skip_records_without_id(self):
+
+        records = [book.to_dict() for book in self.library.books.values()]
+        records.append({"title": "Мастер и Маргарита", "author": "Михаил Булгаков", "year": 1967})
+
+        self.write_records(records)
+        self.library.read_data_from_json()
+        ids = set(self.library.books)
+
+        records[0]["status"] = "Выдана"
+        self.write_records(records)
+        self.library.read_data_from_json()
+
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(set(self.library.books), ids)
+
+    def test_force_reload(self):
+
+        book = next(iter(self.library.books.values()))
+        book.title = "Изменено в памяти"
+
+        self.library.read_data_from_json(force=True)
+
+        self.assertNotEqual(book.title, "Изменено в памяти")
+
+
 class TestWriteJson(unittest.TestCase):
 
     def setUp(self):
@@ -115,6 +251,158 @@ class TestWriteJson(unittest.TestCase):
         self.assertEqual(data, [])
 
 
+class TestCsvStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library("test_library.json")
+        self.csv_path = "test_books.csv"
+
+        with open(self.csv_path, "w", encoding="utf-8") as file:
+            file.write("title,author,year,status\n")
+            file.write("1984,Джордж Оруэлл,1949,В наличии\n")
+            file.write("Мы,Евгений Замятин,1920,Выдана\n")
+            file.write("Без года,Неизвестный автор,,\n")
+            file.write("451° по Фаренгейту,Рэй Брэдбери,1953,\n")
+
+    def tearDown(self):
+
+        for path in (self.csv_path, "test_export.csv", "test_export.jsonl"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_import_chunks(self):
+
+        chunks = []
+        summary = self.library.import_from_csv(self.csv_path, chunk_size=2, report=chunks.append)
+
+        self.assertEqual(summary["added"], 3)
+        self.assertEqual(summary["rejected"], 1)
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual([chunk["processed"] for chunk in chunks], [2, 1])
+
+        statuses = sorted(book.status for book in self.library.books.values())
+        self.assertEqual(statuses, ["В наличии", "В наличии", "Выдана"])
+
+    def test_import_missing_columns(self):
+
+        with open(self.csv_path, "w", encoding="utf-8") as file:
+            file.write("title,author\n1984,Джордж Оруэлл\n")
+
+        with self.assertRaises(ValueError):
+            self.library.import_from_csv(self.csv_path)
+
+    def test_export_csv_roundtrip(self):
+
+        self.library.import_from_csv(self.csv_path)
+
+        total = self.library.export_books("test_export.csv", chunk_size=2)
+        self.assertEqual(total, 3)
+
+        other = Library("test_library.json")
+        other.import_from_csv("test_export.csv")
+
+        self.assertEqual(
+            {book_id: book.to_dict() for book_id, book in other.books.items()},
+            {book_id: book.to_dict() for book_id, book in self.library.books.items()},
+        )
+
+    def test_export_jsonl(self):
+
+        self.library.import_from_csv(self.csv_path)
+        self.library.export_books("test_export.jsonl")
+
+        with open("test_export.jsonl", "r", encoding="utf-8") as file:
+            records = [json.loads(line) for line in file]
+
+        self.assertEqual(records, [book.to_dict() for book in self.library.books.values()])
+
+    def test_export_unknown_extension(self):
+
+        self.library.import_from_csv(self.csv_path)
+
+        with self.assertRaises(ValueError):
+            self.library.export_books("test_export.json")
+
+        self.assertFalse(os.path.exists("test_export.json"))
+
+    def test_add_books_skips_invalid(self):
+
+        added = self.library.add_books([
+            {"title": "1984", "author": "Джордж Оруэлл", "year": 1949},
+            {"title": "Мы", "author": "Евгений Замятин", "year": 1920, "status": "Утеряна"},
+            {"title": "Без автора", "year": 1920},
+        ])
+
+        self.assertEqual(added, 1)
+        self.assertEqual(len(self.library.books), 1)
+
+    def test_add_books_existing_id(self):
+
+        self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        book = next(iter(self.library.books.values()))
+
+        added = self.library.add_books([
+            {"id": book.id, "title": "Мы", "author": "Евгений Замятин", "year": 1920},
+        ])
+
+        self.assertEqual(added, 0)
+        self.assertEqual(self.library.books[book.id].title, "1984")
+
+    def test_add_books_status(self):
+
+        added = self.library.add_books([
+            {"title": "1984", "author": "Джордж Оруэлл", "year": 1949, "status": 1},
+            {"title": "Мы", "author": "Евгений Замятин", "year": 1920, "status": "выдана"},
+        ])
+
+        self.assertEqual(added, 1)
+        self.assertEqual(next(iter(self.library.books.values())).status, "Выдана")
+
+
+class TestCompressedStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.paths = []
+
+    def tearDown(self):
+
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_roundtrip(self):
+
+        for file_path in ("test_library.json.gz", "test_library.json.bz2", "test_library.json.xz"):
+            with self.subTest(file_path=file_path):
+                self.paths.append(file_path)
+
+                library = Library(file_path)
+                library.add_book("1984", "Джордж Оруэлл", 1949)
+                library.add_book("Мы", "Евгений Замятин", 1920)
+                library.write_data_to_json()
+
+                with open(file_path, "rb") as file:
+                    self.assertNotIn("Оруэлл".encode("utf-8"), file.read())
+
+                loaded = Library(file_path)
+
+                self.assertEqual(
+                    {book_id: book.to_dict() for book_id, book in loaded.books.items()},
+                    {book_id: book.to_dict() for book_id, book in library.books.items()},
+                )
+
+    def test_compressed_empty(self):
+
+        file_path = "test_library.json.gz"
+        self.paths.append(file_path)
+
+        with gzip.open(file_path, "wb"):
+            pass
+
+        library = Library(file_path)
+        self.assertEqual(len(library.books), 0)
+
+
 class TestAddBook(unittest.TestCase):
 
     def setUp(self):
@@ -159,6 +447,93 @@ class TestAddBook(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.library.add_book(None, "Джордж Оруэлл", 1949)
 
+class TestDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library("test_library.json")
+        self.library.add_book("1984", "Джордж Оруэлл", 1949)
+
+    def test_add_duplicate(self):
+
+        with self.assertRaises(ValueError):
+            self.library.add_book("  1984 ", "джордж  оруэлл", 1949)
+
+        self.assertEqual(len(self.library.books), 1)
+
+    def test_add_same_title_other_year(self):
+
+        self.library.add_book("1984", "Джордж Оруэлл", 1950)
+        self.assertEqual(len(self.library.books), 2)
+
+    def test_add_books_skips_duplicates(self):
+
+        added = self.library.add_books([
+            {"title": "1984", "author": "Джордж Оруэлл", "year": 1949},
+            {"title": "Мы", "author": "Евгений Замятин", "year": 1920},
+            {"title": "МЫ", "author": "Евгений Замятин", "year": 1920},
+        ])
+
+        self.assertEqual(added, 1)
+        self.assertEqual(len(self.library.books), 2)
+
+    def test_find_duplicates(self):
+
+        book = Book("1984", "Джордж Оруэлл", 1949)
+        self.library.books[book.id] = book
+
+        groups = self.library.find_duplicates()
+
+        self.assertEqual(len(groups), 1)
+        self.assertIn(book, groups[0])
+        self.assertEqual(len(groups[0]), 2)
+
+        del self.library.books[book.id]
+        self.assertEqual(self.library.find_duplicates(), [])
+        self.assertEqual(self.library.books.duplicates_of("1984", "Джордж Оруэлл", 1949), set(self.library.books))
+
+    def test_hash_collision(self):
+
+        # Все ключи получают один хэш: дубликаты должны определяться по самим ключам
+        with mock.patch("library.catalog.hash", create=True, return_value=0):
+            books = Catalog(self.library.books)
+            other = Book("Мы", "Евгений Замятин", 1920)
+            books[other.id] = other
+
+            self.assertEqual(books.duplicates_of("Мы", "Евгений Замятин", 1920), {other.id})
+            self.assertEqual(list(books.duplicate_groups()), [])
+
+            duplicate = Book("мы", "Евгений Замятин", 1920)
+            books[duplicate.id] = duplicate
+
+            self.assertEqual(list(books.duplicate_groups()), [sorted([other.id, duplicate.id])])
+
+    def test_set_non_book(self):
+
+        with self.assertRaises(AttributeError):
+            self.library.books["x"] = "не книга"
+
+        self.assertNotIn("x", self.library.books)
+        self.assertEqual(len(self.library.books), 1)
+
+    def test_assigned_dict_is_indexed(self):
+
+        book = Book("Мы", "Евгений Замятин", 1920)
+        self.library.books = {book.id: book}
+
+        with self.assertRaises(ValueError):
+            self.library.add_book("Мы", "Евгений Замятин", 1920)
+
+    def test_pickle_books(self):
+
+        restored = pickle.loads(pickle.dumps(self.library.books))
+
+        self.assertEqual(
+            {book_id: book.to_dict() for book_id, book in restored.items()},
+            {book_id: book.to_dict() for book_id, book in self.library.books.items()},
+        )
+        self.assertEqual(len(restored.duplicates_of("1984", "Джордж Оруэлл", 1949)), 1)
+
+
 class TestRemoveBook(unittest.TestCase):
 
     def setUp(self):
@@ -239,6 +614,196 @@ class TestSearchBooks(unittest.TestCase):
         result = self.library.search_books(title="Над пропастью во ржи")
         self.assertEqual(len(result), 0)
 
+class TestQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library("test_library.json")
+
+        self.library.add_books([
+            {"title": "1984", "author": "Джордж Оруэлл", "year": 1949},
+            {"title": "Скотный двор", "author": "Джордж Оруэлл", "year": 1945, "status": "Выдана"},
+            {"title": "Мы", "author": "Евгений Замятин", "year": 1920},
+            {"title": "451 градус по Фаренгейту", "author": "Рэй Брэдбери", "year": 1953, "status": "Выдана"},
+            {"title": "Мастер и Маргарита", "author": "Михаил Булгаков", "year": 1967},
+        ])
+
+    def titles(self, books):
+        return sorted(book.title for book in books)
+
+    def test_search_lookups(self):
+
+        result = self.library.search_books(year__between=(1940, 1955))
+        self.assertEqual(self.titles(result), ["1984", "451 градус по Фаренгейту", "Скотный двор"])
+
+        result = self.library.search_books(author__in=["Евгений Замятин", "Михаил Булгаков"], year__lt=1950)
+        self.assertEqual(self.titles(result), ["Мы"])
+
+        result = self.library.search_books(status="выдана", title__contains="двор")
+        self.assertEqual(self.titles(result), ["Скотный двор"])
+
+    def test_query_or_not(self):
+
+        query = (Q(author="Джордж Оруэлл") | Q(year__gte=1960)) & ~Q(status="Выдана")
+        result = self.library.query(query)
+
+        self.assertEqual(self.titles(result), ["1984", "Мастер и Маргарита"])
+
+    def test_sort_and_limit(self):
+
+        result = self.library.search_books(year__gte=1900, sort_by="-year", limit=2)
+        self.assertEqual([book.year for book in result], [1967, 1953])
+
+        result = self.library.search_books(status="В наличии", sort_by="title")
+        self.assertEqual([book.title for book in result], ["1984", "Мастер и Маргарита", "Мы"])
+
+    def test_order_without_sort(self):
+
+        titles = [f"Том {number}" for number in range(20)]
+        self.library.add_books([{"title": title, "author": "Один автор", "year": 2000} for title in titles])
+
+        result = self.library.search_books(author="Один автор")
+        self.assertEqual([book.title for book in result], titles)
+
+        result = self.library.search_books(author="Один автор", limit=3)
+        self.assertEqual([book.title for book in result], titles[:3])
+
+        result = self.library.search_books(year__gte=1900)
+        expected = [book.title for book in self.library.books.values()]
+        self.assertEqual([book.title for book in result], expected)
+
+    def test_filter_plan_execute(self):
+
+        plan = FilterPlan(Q(title__contains="Мы"), len(self.library.books))
+
+        self.assertEqual(self.titles(self.library.books[book_id] for book_id in plan.execute(self.library.books)),
+                         ["Мы"])
+
+    def test_incomplete_subclass(self):
+
+        class NoMatches(Query):
+            pass
+
+        class NoExecute(Plan):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoMatches()
+
+        with self.assertRaises(TypeError):
+            NoExecute("Пустой план", 0, 0)
+
+    def test_index_follows_status(self):
+
+        book = self.library.search_books(title="Мы")[0]
+        self.library.update_status(book.id, "выдана")
+
+        self.assertIn(book, self.library.search_books(status="Выдана"))
+        self.assertNotIn(book, self.library.search_books(status="В наличии"))
+
+    def test_matches_scan(self):
+
+        query = Q(year__between=(1920, 1950)) & ~Q(author="Джордж Оруэлл") | Q(title__contains="Мастер")
+        expected = [book for book in self.library.books.values() if query.matches(book)]
+
+        self.assertEqual(self.titles(self.library.query(query)), self.titles(expected))
+
+    def test_invalid(self):
+
+        with self.assertRaises(ValueError):
+            self.library.search_books(title="1984", genre="антиутопия")
+
+        with self.assertRaises(ValueError):
+            self.library.search_books(title__gte="1984")
+
+        with self.assertRaises(TypeError):
+            self.library.search_books(year__in=["1949"])
+
+        with self.assertRaises(ValueError):
+            self.library.search_books(year=1949, sort_by="genre")
+
+    def test_explain(self):
+
+        plan = self.library.explain(author="Джордж Оруэлл", year__gte=1900, limit=1)
+
+        lines = plan.splitlines()
+        self.assertEqual(lines[0], "Limit 1")
+        self.assertIn("IndexLookup author = 'Джордж Оруэлл'", lines[2])
+
+        plan = self.library.explain(Q(title__contains="Мы"))
+        self.assertTrue(plan.startswith("FullScan"))
+
+
+class TestAggregates(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library("test_library.json")
+
+        self.library.add_books([
+            {"title": "1984", "author": "Джордж Оруэлл", "year": 1949},
+            {"title": "Скотный двор", "author": "Джордж Оруэлл", "year": 1945, "status": "Выдана"},
+            {"title": "Мы", "author": "Евгений Замятин", "year": 1920},
+            {"title": "451 градус по Фаренгейту", "author": "Рэй Брэдбери", "year": 1953},
+            {"title": "Марсианские хроники", "author": "Рэй Брэдбери", "year": 1950},
+            {"title": "Вино из одуванчиков", "author": "Рэй Брэдбери", "year": 1957},
+        ])
+
+    def test_count_by(self):
+
+        self.assertEqual(self.library.count_by("author"), {
+            "Джордж Оруэлл": 2, "Евгений Замятин": 1, "Рэй Брэдбери": 3,
+        })
+        self.assertEqual(self.library.count_by("status"), {"в наличии": 5, "выдана": 1})
+
+    def test_top(self):
+
+        self.assertEqual(self.library.top("author", 2), [("Рэй Брэдбери", 3), ("Джордж Оруэлл", 2)])
+        self.assertEqual(self.library.top("author", 0), [])
+        self.assertEqual(len(self.library.top("author", 10)), 3)
+
+    def test_top_does_not_scan_bucket(self):
+
+        class CountingBucket(dict):
+            visited = 0
+
+            def __iter__(self):
+                for value in super().__iter__():
+                    CountingBucket.visited += 1
+                    yield value
+
+        self.library.add_books([{"title": "Том", "author": f"Автор {number}", "year": 2000} for number in range(1000)])
+
+        counter = self.library.books._counters["author"]
+        counter._buckets[1] = CountingBucket(counter._buckets[1])
+
+        self.assertEqual(len(self.library.top("author", 5)), 5)
+        self.assertEqual(CountingBucket.visited, 3)
+
+    def test_decade_histogram(self):
+
+        self.assertEqual(self.library.decade_histogram(), {1920: 1, 1940: 2, 1950: 3})
+
+    def test_incremental_updates(self):
+
+        book = self.library.search_books(title="Мы")[0]
+
+        self.library.update_status(book.id, "выдана")
+        self.assertEqual(self.library.count_by("status"), {"в наличии": 4, "выдана": 2})
+
+        self.library.remove_book(book.id)
+        self.assertNotIn(1920, self.library.decade_histogram())
+        self.assertNotIn("Евгений Замятин", self.library.count_by("author"))
+
+        self.library.add_book("Мы", "Евгений Замятин", 1920)
+        self.assertEqual(self.library.top("decade", 1), [(1950, 3)])
+        self.assertEqual(self.library.count_by("year")[1920], 1)
+        self.assertEqual(self.library.top("status", 1), [("в наличии", 5)])
+
+    def test_invalid_field(self):
+
+        with self.assertRaises(ValueError):
+            self.library.count_by("genre")
+
+
 class TestAllBooks(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,137 @@
+import os
+import json
+import unittest
+from io import StringIO
+from contextlib import redirect_stdout, redirect_stderr
+
+from library.library import Library
+from main import parse_line, run_batch, run_cli
+
+
+class TestParseLine(unittest.TestCase):
+
+    def test_parse_text(self):
+
+        op, params = parse_line('add "1984" "Джордж Оруэлл" 1949')
+
+        self.assertEqual(op, "add")
+        self.assertEqual(params, {"title": "1984", "author": "Джордж Оруэлл", "year": "1949"})
+
+    def test_parse_keywords(self):
+
+        op, params = parse_line('search author="Джордж Оруэлл" year=1949')
+
+        self.assertEqual(op, "search")
+        self.assertEqual(params, {"author": "Джордж Оруэлл", "year": "1949"})
+
+    def test_parse_value_with_equals(self):
+
+        op, params = parse_line('add "E=mc2" "Альберт Эйнштейн" 1905')
+
+        self.assertEqual(op, "add")
+        self.assertEqual(params, {"title": "E=mc2", "author": "Альберт Эйнштейн", "year": "1905"})
+
+    def test_parse_lookups(self):
+
+        op, params = parse_line("search year__gte=1900 sort_by=-year limit=2")
+
+        self.assertEqual(params, {"year__gte": "1900", "sort_by": "-year", "limit": "2"})
+
+        with self.assertRaises(ValueError):
+            parse_line("search isbn=123")
+
+    def test_parse_json(self):
+
+        op, params = parse_line('{"op": "remove", "book_id": "abc"}')
+
+        self.assertEqual(op, "remove")
+        self.assertEqual(params, {"book_id": "abc"})
+
+    def test_parse_unknown(self):
+
+        with self.assertRaises(ValueError):
+            parse_line("borrow 1984")
+
+
+class TestRunBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = "test_batch_library.json"
+        self.library = Library(self.file_path)
+
+    def tearDown(self):
+
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def test_run_script(self):
+
+        script = [
+            "# комментарий",
+            'add "1984" "Джордж Оруэлл" 1949',
+            "",
+            '{"op": "add", "title": "Мы", "author": "Евгений Замятин", "year": 1920}',
+        ]
+
+        summary = run_batch(self.library, script)
+
+        self.assertEqual(summary["done"], 2)
+        self.assertEqual(summary["errors"], 0)
+        self.assertTrue(summary["saved"])
+
+        with open(self.file_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        self.assertEqual(len(data), 2)
+
+    def test_run_errors(self):
+
+        script = [
+            "remove неизвестный-id",
+            'add "1984" "Джордж Оруэлл" 1949',
+        ]
+
+        with redirect_stderr(StringIO()):
+            summary = run_batch(self.library, script)
+
+        self.assertEqual(summary["done"], 1)
+        self.assertEqual(summary["errors"], 1)
+
+    def test_stop_on_error(self):
+
+        script = [
+            "remove неизвестный-id",
+            'add "1984" "Джордж Оруэлл" 1949',
+        ]
+
+        with redirect_stderr(StringIO()):
+            summary = run_batch(self.library, script, stop_on_error=True)
+
+        self.assertEqual(summary["done"], 0)
+        self.assertFalse(summary["saved"])
+        self.assertFalse(os.path.exists(self.file_path))
+
+    def test_save_error(self):
+
+        self.library.file_path = os.path.join("нет-такого-каталога", self.file_path)
+
+        with redirect_stderr(StringIO()) as errors:
+            summary = run_batch(self.library, ['add "1984" "Джордж Оруэлл" 1949'])
+
+        self.assertEqual(summary["done"], 1)
+        self.assertEqual(summary["errors"], 1)
+        self.assertFalse(summary["saved"])
+        self.assertIn("Ошибка при сохранении", errors.getvalue())
+
+    def test_cli_add(self):
+
+        with redirect_stdout(StringIO()) as output:
+            code = run_cli(["-f", self.file_path, "add", "1984", "Джордж Оруэлл", "1949"])
+
+        self.assertEqual(code, 0)
+        self.assertIn("Выполнено операций: 1", output.getvalue())
+        self.assertEqual(len(Library(self.file_path).books), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import uuid
+import unittest
+import multiprocessing
+from unittest import mock
+
+from library.library import Library
+from library.shared import SharedCatalog, SharedCatalogPublisher
+
+
+def count_in_worker(name, queue):
+
+    with SharedCatalog(name) as catalog:
+        queue.put((len(catalog), [book.title for book in catalog.search_books(author="Джордж Оруэлл")]))
+
+
+class TestSharedCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library("test_library.json")
+        self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        self.library.add_book("Скотный двор", "Джордж Оруэлл", 1945)
+        self.library.add_book("Мы", "Евгений Замятин", 1920)
+
+        self.name = f"lib{uuid.uuid4().hex[:8]}"
+        self.publisher = SharedCatalogPublisher(self.name)
+        self.publisher.publish(self.library.books.values())
+
+        self.catalog = SharedCatalog(self.name)
+
+    def tearDown(self):
+        self.catalog.close()
+        self.publisher.close()
+
+    def test_search_by_id(self):
+
+        for book in self.library.books.values():
+            found = self.catalog.search_books_by_id(book.id)
+            self.assertEqual(found.to_dict(), book.to_dict())
+
+        self.assertIsNone(self.catalog.search_books_by_id(str(uuid.uuid4())))
+
+    def test_search_books(self):
+
+        result = self.catalog.search_books(author="Джордж Оруэлл")
+        self.assertEqual(sorted(book.title for book in result), ["1984", "Скотный двор"])
+
+        result = self.catalog.search_books(title="1984", year=1949)
+        self.assertEqual(len(result), 1)
+
+        self.assertEqual(self.catalog.search_books(title="Мы", year=1949), [])
+
+    def test_search_lookups(self):
+
+        result = self.catalog.search_books(author="Джордж Оруэлл", year__lt=1948)
+        self.assertEqual([book.title for book in result], ["Скотный двор"])
+
+        result = self.catalog.search_books(status="в наличии", year__gte=1900, sort_by="-year", limit=2)
+        self.assertEqual([book.year for book in result], [1949, 1945])
+
+    def test_search_matches_library(self):
+
+        for params in ({"author": "Джордж Оруэлл", "limit": 1}, {"year__gte": 1900}, {"status": "В наличии"},
+                       {"year__gte": 1900, "sort_by": "-year", "limit": 2}, {}):
+            with self.subTest(params=params):
+                expected = [book.id for book in self.library.search_books(**params)]
+                self.assertEqual([book.id for book in self.catalog.search_books(**params)], expected)
+
+    def test_decode_only_matches(self):
+
+        with mock.patch.object(SharedCatalog, "_decode", wraps=SharedCatalog._decode) as decode:
+            result = self.catalog.search_books(status="выдана", year__between=(1900, 1950))
+
+        self.assertEqual(result, [])
+        self.assertEqual(decode.call_count, 0)
+
+        with mock.patch.object(SharedCatalog, "_decode", wraps=SharedCatalog._decode) as decode:
+            result = self.catalog.search_books(year__in=[1920, 1945])
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(decode.call_count, 2)
+
+    def test_search_invalid(self):
+
+        with self.assertRaises(ValueError):
+            self.catalog.search_books(genre="антиутопия")
+
+        with self.assertRaises(TypeError):
+            self.catalog.search_books(year="1949")
+
+    def test_new_generation(self):
+
+        self.assertEqual(len(self.catalog), 3)
+
+        self.library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1967)
+        generation = self.publisher.publish(self.library.books.values())
+
+        self.assertEqual(len(self.catalog), 4)
+        self.assertEqual(self.catalog.generation, generation)
+        self.assertEqual(len(self.catalog.search_books(author="Михаил Булгаков")), 1)
+
+    def test_decode_does_not_log(self):
+
+        book = next(iter(self.library.books.values()))
+
+        with self.assertNoLogs("library.book"):
+            self.catalog.search_books_by_id(book.id)
+            self.catalog.search_books(author="Джордж Оруэлл")
+
+    def test_recover_after_crash(self):
+
+        # Имитируем аварийное завершение: сегменты остаются, издатель не закрыт
+        crashed = self.publisher
+        crashed._control.close()
+        crashed._data.close()
+
+        with self.assertLogs("library.shared", level="WARNING"):
+            self.publisher = SharedCatalogPublisher(self.name)
+
+        self.assertEqual(self.publisher.generation, 1)
+
+        self.library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1967)
+        self.assertEqual(self.publisher.publish(self.library.books.values()), 2)
+        self.assertEqual(len(self.catalog), 4)
+
+    def test_worker_process(self):
+
+        queue = multiprocessing.Queue()
+        worker = multiprocessing.Process(target=count_in_worker, args=(self.name, queue))
+        worker.start()
+        worker.join(10)
+
+        count, titles = queue.get(timeout=5)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(sorted(titles), ["1984", "Скотный двор"])
+
+
+if __name__ == '__main__':
+    unittest.main()